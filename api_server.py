@@ -4,9 +4,11 @@ FastAPI Server for N8N Workflow Documentation
 High-performance API with sub-100ms response times.
 """
 
-from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, BackgroundTasks, Header
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel, field_validator
@@ -14,10 +16,32 @@ from typing import Optional, List, Dict, Any
 import json
 import os
 import asyncio
+import datetime
+import functools
+import gzip
+import hashlib
+import mimetypes
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import format_datetime
 from pathlib import Path
+from urllib.parse import quote
+import pydantic_core
 import uvicorn
 
-from workflow_db import WorkflowDatabase
+try:
+    import orjson  # optional, faster JSON encoding for search responses
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # optional, adds .br copies of static assets
+except ImportError:
+    brotli = None
+
+from workflow_db import WorkflowDatabase, SuggestIndex, TfidfMatrix, np
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -39,6 +63,298 @@ app.add_middleware(
 # Initialize database
 db = WorkflowDatabase()
 
+# Blocking work runs on bounded executors so the event loop never waits on it.
+# DB calls get one thread per pooled connection; workflow file reads and parses
+# get their own, smaller executor so large files can't starve searches.
+db_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("WORKFLOW_API_DB_WORKERS", str(db.pool_size))),
+    thread_name_prefix="api-db"
+)
+file_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("WORKFLOW_API_FILE_WORKERS", "4")),
+    thread_name_prefix="api-file"
+)
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking database call on the DB executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(func, *args, **kwargs))
+
+async def run_file(func, *args, **kwargs):
+    """Run a blocking file read/parse on the file executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(file_executor, functools.partial(func, *args, **kwargs))
+
+def dump_json(content: Any) -> bytes:
+    """Serialize plain data to compact JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return pydantic_core.to_json(content)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in candidates)
+
+# Cache-Control per route; each can be overridden with WORKFLOW_CACHE_CONTROL_<ROUTE>,
+# e.g. WORKFLOW_CACHE_CONTROL_DETAIL="public, max-age=3600". "no-cache" lets clients
+# and proxies keep the body but revalidate it, which costs a 304 while nothing changed.
+CACHE_CONTROL_DEFAULTS = {
+    "stats": "public, no-cache",
+    "search": "public, no-cache",
+    "integrations": "public, no-cache",
+    "node_types": "public, no-cache",
+    "categories": "public, max-age=300",
+    "detail": "public, no-cache",
+    "diagram": "public, no-cache",
+    "download": "public, no-cache",
+    "similar": "public, no-cache",
+    "related": "public, no-cache",
+    "suggest": "public, max-age=60",
+    "facets": "public, no-cache",
+}
+CACHE_CONTROL = {
+    route: os.environ.get(f"WORKFLOW_CACHE_CONTROL_{route.upper()}", policy)
+    for route, policy in CACHE_CONTROL_DEFAULTS.items()
+}
+
+def index_etag(generation: int, last_indexed: str) -> str:
+    """Weak ETag for responses derived from one index run (stats, listings)."""
+    token = hashlib.md5(f"{generation}:{last_indexed}".encode()).hexdigest()[:16]
+    return f'W/"{token}"'
+
+def http_date(timestamp: float) -> str:
+    """Format a POSIX timestamp for Last-Modified."""
+    return format_datetime(datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc), usegmt=True)
+
+def index_headers(route: str, generation: int, last_indexed: str) -> Dict[str, str]:
+    """Validators and Cache-Control for a response derived from the index."""
+    headers = {"ETag": index_etag(generation, last_indexed), "Cache-Control": CACHE_CONTROL[route]}
+    if last_indexed:
+        headers["Last-Modified"] = http_date(datetime.datetime.fromisoformat(last_indexed).timestamp())
+    return headers
+
+def workflow_headers(route: str, workflow: Dict[str, Any], weak: bool = False) -> Dict[str, str]:
+    """Validators and Cache-Control for a response derived from one workflow file."""
+    etag = f'"{workflow["file_hash"]}"'
+    headers = {"ETag": f"W/{etag}" if weak else etag, "Cache-Control": CACHE_CONTROL[route]}
+    if workflow.get("file_mtime_ns"):
+        headers["Last-Modified"] = http_date(workflow["file_mtime_ns"] / 1e9)
+    return headers
+
+def not_modified(if_none_match: Optional[str], headers: Dict[str, str]) -> Optional[Response]:
+    """A 304 response when If-None-Match matches the ETag in headers, else None."""
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return None
+
+def accepts_encoding(accept_encoding: Optional[str], encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows encoding (and doesn't give it q=0)."""
+    names = {encoding, "x-gzip"} if encoding == "gzip" else {encoding}
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in names:
+            q = params.strip().lower().removeprefix("q=")
+            try:
+                return not params or float(q) > 0
+            except ValueError:
+                return False
+    return False
+
+# Precompressed copies of static assets, in order of preference
+STATIC_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+STATIC_PRECOMPRESS_MIN_SIZE = 1000  # same threshold as GZipMiddleware
+
+def precompress_static(directory: str = "static") -> int:
+    """Write .gz (and, with brotli installed, .br) copies of static assets that lack a fresh one.
+    
+    Runs once at startup, so serving a static file never compresses anything.
+    Returns the number of copies written.
+    """
+    written = 0
+    for path in Path(directory).rglob("*"):
+        if not path.is_file() or path.suffix in (".gz", ".br", ".tmp"):
+            continue
+        source_stat = path.stat()
+        if source_stat.st_size < STATIC_PRECOMPRESS_MIN_SIZE:
+            continue
+        
+        data = None
+        for encoding, suffix in STATIC_ENCODINGS:
+            if encoding == "br" and brotli is None:
+                continue
+            target = path.with_name(path.name + suffix)
+            if target.exists() and target.stat().st_mtime_ns >= source_stat.st_mtime_ns:
+                continue
+            if data is None:
+                data = path.read_bytes()
+            if encoding == "br":
+                compressed = brotli.compress(data, quality=11)
+            else:
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            temp = target.with_name(target.name + ".tmp")
+            temp.write_bytes(compressed)
+            os.replace(temp, target)
+            written += 1
+    return written
+
+def precompressed_file_response(full_path: str, stat_result: os.stat_result,
+                                accept_encoding: Optional[str], status_code: int = 200) -> FileResponse:
+    """FileResponse for a static file, using the best fresh precompressed copy the client accepts.
+    
+    FileResponse handles Range and hands the file to the server for a
+    zero-copy send (ASGI pathsend) where the server supports it.
+    """
+    headers = {"Vary": "Accept-Encoding"}
+    media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+    for encoding, suffix in STATIC_ENCODINGS:
+        if not accepts_encoding(accept_encoding, encoding):
+            continue
+        try:
+            variant_stat = os.stat(full_path + suffix)
+        except OSError:
+            continue
+        if variant_stat.st_mtime_ns >= stat_result.st_mtime_ns:
+            headers["Content-Encoding"] = encoding
+            return FileResponse(full_path + suffix, status_code=status_code, stat_result=variant_stat,
+                                media_type=media_type, headers=headers)
+    return FileResponse(full_path, status_code=status_code, stat_result=stat_result,
+                        media_type=media_type, headers=headers)
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles serving the .br/.gz copies written by precompress_static."""
+    
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        response = precompressed_file_response(
+            str(full_path), stat_result, request_headers.get("accept-encoding"), status_code
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+def content_disposition(filename: str) -> str:
+    """Content-Disposition for a download, as FileResponse builds it."""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+def load_workflow_json(file_path: str) -> Dict[str, Any]:
+    """Read and parse a workflow file."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+class QueryCache:
+    """In-process LRU cache for search responses.
+    
+    Entries expire after ``ttl`` seconds and are all dropped as soon as the
+    index generation moves on, so results stay correct after a reindex (also
+    one run from the CLI in another process).
+    """
+    
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, key: tuple, generation: int):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            if generation != self._generation:
+                if self._entries:
+                    self.invalidations += 1
+                    self._entries.clear()
+                self._generation = generation
+            
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            
+            self.misses += 1
+            return None
+    
+    def put(self, key: tuple, generation: int, value):
+        """Store value unless the generation changed while it was computed."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "generation": self._generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+query_cache = QueryCache(
+    max_entries=int(os.environ.get("WORKFLOW_CACHE_SIZE", "256")),
+    ttl=float(os.environ.get("WORKFLOW_CACHE_TTL", "300"))
+)
+
+# Typeahead index; requests answer from memory and at most every SUGGEST_REFRESH_SECONDS one of
+# them checks the index generation, rebuilding in the background when it moved on
+SUGGEST_REFRESH_SECONDS = float(os.environ.get("WORKFLOW_SUGGEST_REFRESH", "5"))
+suggest_state: Dict[str, Any] = {"index": None, "checked": 0.0, "refresh": None}
+
+async def refresh_suggest_index() -> SuggestIndex:
+    """Rebuild the typeahead index if the database holds a newer index generation."""
+    suggest_state["checked"] = time.monotonic()
+    index = suggest_state["index"]
+    generation, _ = await run_db(db.get_index_state)
+    if index is None or index.generation != generation:
+        index = suggest_state["index"] = await run_db(db.build_suggest_index)
+    return index
+
+# Memory-mapped TF-IDF matrix and the (inode, mtime) of the file it was loaded from
+tfidf_state: Dict[str, Any] = {"matrix": None, "signature": None}
+
+def current_tfidf() -> Optional[TfidfMatrix]:
+    """The memory-mapped TF-IDF matrix, remapped whenever the indexer has rewritten it.
+    
+    Stats (and may remap) the matrix files, so call it through run_file.
+    """
+    try:
+        stat_result = os.stat(TfidfMatrix.array_path(db.tfidf_path, "data"))
+    except OSError:
+        return None
+    signature = (stat_result.st_ino, stat_result.st_mtime_ns)
+    if signature != tfidf_state["signature"]:
+        tfidf_state["matrix"] = TfidfMatrix.load(db.tfidf_path)
+        tfidf_state["signature"] = signature
+    return tfidf_state["matrix"]
+
 # Startup function to verify database
 @app.on_event("startup")
 async def startup_event():
@@ -52,6 +368,27 @@ async def startup_event():
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
         raise
+    
+    await refresh_suggest_index()
+    
+    if np is not None:
+        # Databases indexed before the matrix existed (or without numpy) get one now
+        if TfidfMatrix.load(db.tfidf_path) is None:
+            await run_db(db.write_tfidf_matrix)
+        if await run_file(current_tfidf) is not None:
+            print("✅ TF-IDF matrix memory-mapped for related workflows")
+    
+    if Path("static").exists():
+        written = precompress_static("static")
+        if written:
+            print(f"✅ Precompressed {written} static file variants")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the executors and close pooled database connections."""
+    db_executor.shutdown(wait=True)
+    file_executor.shutdown(wait=True)
+    db.close()
 
 # Response models
 class WorkflowSummary(BaseModel):
@@ -67,6 +404,11 @@ class WorkflowSummary(BaseModel):
     tags: List[str] = []
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
+    graph_depth: int = 0
+    max_fan_out: int = 0
+    branch_count: int = 0
+    disconnected_nodes: int = 0
+    cycle_count: int = 0
     
     class Config:
         # Allow conversion of int to bool for active field
@@ -82,12 +424,92 @@ class WorkflowSummary(BaseModel):
 
 class SearchResponse(BaseModel):
     workflows: List[WorkflowSummary]
-    total: int
+    total: Optional[int]
     page: int
     per_page: int
-    pages: int
+    pages: Optional[int]
     query: str
     filters: Dict[str, Any]
+    next_cursor: Optional[str] = None
+    total_exact: bool = True
+
+class FacetsResponse(BaseModel):
+    total: int
+    query: str
+    facets: Dict[str, Dict[str, int]]
+
+class Suggestion(BaseModel):
+    text: str
+    kind: str
+    count: int
+
+class SuggestResponse(BaseModel):
+    query: str
+    suggestions: List[Suggestion]
+
+class SimilarWorkflow(WorkflowSummary):
+    similarity: float
+
+class SimilarResponse(BaseModel):
+    filename: str
+    workflows: List[SimilarWorkflow]
+
+def workflow_summary(workflow: Dict[str, Any]) -> Dict[str, Any]:
+    """The WorkflowSummary fields of a search row, as plain data."""
+    return {
+        'id': workflow.get('id'),
+        'filename': workflow.get('filename') or '',
+        'name': workflow.get('name') or '',
+        'active': bool(workflow.get('active')),
+        'description': workflow.get('description') or '',
+        'trigger_type': workflow.get('trigger_type') or 'Manual',
+        'complexity': workflow.get('complexity') or 'low',
+        'node_count': workflow.get('node_count') or 0,
+        'integrations': workflow.get('integrations') or [],
+        'tags': workflow.get('tags') or [],
+        'created_at': workflow.get('created_at'),
+        'updated_at': workflow.get('updated_at'),
+        'graph_depth': workflow.get('graph_depth') or 0,
+        'max_fan_out': workflow.get('max_fan_out') or 0,
+        'branch_count': workflow.get('branch_count') or 0,
+        'disconnected_nodes': workflow.get('disconnected_nodes') or 0,
+        'cycle_count': workflow.get('cycle_count') or 0
+    }
+
+def metric_bounds(min_depth: Optional[int], max_depth: Optional[int], min_fan_out: Optional[int],
+                  min_branches: Optional[int], has_cycles: Optional[bool],
+                  has_disconnected: Optional[bool]) -> tuple:
+    """Graph-metric query parameters as the (metric_min, metric_max) dicts search_page takes."""
+    metric_min = {"depth": min_depth, "fan_out": min_fan_out, "branches": min_branches}
+    metric_max = {"depth": max_depth}
+    for metric, flag in (("cycles", has_cycles), ("disconnected", has_disconnected)):
+        if flag is not None:
+            (metric_min if flag else metric_max)[metric] = 1 if flag else 0
+    return (
+        {metric: value for metric, value in metric_min.items() if value is not None},
+        {metric: value for metric, value in metric_max.items() if value is not None}
+    )
+
+def search_response_body(result: Dict[str, Any], page: int, per_page: int,
+                         query: str, filters: Dict[str, Any]) -> bytes:
+    """Serialize a search_page result straight to SearchResponse-shaped JSON bytes.
+    
+    Rows are already typed by the database, so building a WorkflowSummary per
+    row and then having FastAPI validate the response again is skipped; the
+    routes keep response_model=SearchResponse for the OpenAPI schema.
+    """
+    total = result['total']
+    return dump_json({
+        'workflows': [workflow_summary(workflow) for workflow in result['workflows']],
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'pages': (total + per_page - 1) // per_page if total is not None else None,  # Ceiling division
+        'query': query,
+        'filters': filters,
+        'next_cursor': result['next_cursor'],
+        'total_exact': result['total_exact']
+    })
 
 class StatsResponse(BaseModel):
     total: int
@@ -100,7 +522,7 @@ class StatsResponse(BaseModel):
     last_indexed: str
 
 @app.get("/")
-async def root():
+async def root(accept_encoding: Optional[str] = Header(None), if_none_match: Optional[str] = Header(None)):
     """Serve the main documentation page."""
     static_dir = Path("static")
     index_file = static_dir / "index.html"
@@ -112,7 +534,10 @@ async def root():
         <p>Current directory: """ + str(Path.cwd()) + """</p>
         </body></html>
         """)
-    return FileResponse(str(index_file))
+    response = precompressed_file_response(str(index_file), index_file.stat(), accept_encoding)
+    if etag_matches(if_none_match, response.headers["etag"]):
+        return NotModifiedResponse(response.headers)
+    return response
 
 @app.get("/health")
 async def health_check():
@@ -120,10 +545,16 @@ async def health_check():
     return {"status": "healthy", "message": "N8N Workflow API is running"}
 
 @app.get("/api/stats", response_model=StatsResponse)
-async def get_stats():
+async def get_stats(response: Response, if_none_match: Optional[str] = Header(None)):
     """Get workflow database statistics."""
     try:
-        stats = db.get_stats()
+        headers = index_headers("stats", *await run_db(db.get_index_state))
+        cached = not_modified(if_none_match, headers)
+        if cached is not None:
+            return cached
+        
+        stats = await run_db(db.get_stats)
+        response.headers.update(headers)
         return StatsResponse(**stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
@@ -131,78 +562,182 @@ async def get_stats():
 @app.get("/api/workflows", response_model=SearchResponse)
 async def search_workflows(
     q: str = Query("", description="Search query"),
+    match: str = Query("fts", pattern="^(fts|substring|fuzzy)$",
+                       description="How q matches: fts (words, prefix*), substring (anywhere) or fuzzy (typo-tolerant)"),
     trigger: str = Query("all", description="Filter by trigger type"),
     complexity: str = Query("all", description="Filter by complexity"),
     active_only: bool = Query(False, description="Show only active workflows"),
+    integration: str = Query("all", description="Filter by integration (e.g. Slack)"),
+    category: str = Query("all", description="Filter by service category (e.g. messaging)"),
+    node_type: str = Query("all", description="Filter by node type (e.g. n8n-nodes-base.code)"),
+    sort: Optional[str] = Query(None, pattern="^(relevance|recent|depth|fan_out|branches|disconnected|cycles|nodes)$",
+                                description="Sort key (default: relevance for text queries, else recent)"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="Sort direction (ignored for relevance)"),
+    min_depth: Optional[int] = Query(None, ge=0, description="Minimum longest path, in connections"),
+    max_depth: Optional[int] = Query(None, ge=0, description="Maximum longest path, in connections"),
+    min_fan_out: Optional[int] = Query(None, ge=0, description="Minimum nodes fed by a single node"),
+    min_branches: Optional[int] = Query(None, ge=0, description="Minimum number of branching nodes"),
+    has_cycles: Optional[bool] = Query(None, description="Only workflows with (true) or without (false) loops"),
+    has_disconnected: Optional[bool] = Query(None, description="Only workflows with (true) or without (false) unconnected nodes"),
     page: int = Query(1, ge=1, description="Page number"),
-    per_page: int = Query(20, ge=1, le=100, description="Items per page")
+    per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from the previous page (overrides page)"),
+    total: str = Query("exact", pattern="^(exact|estimate|none)$", description="How to count matches: exact, estimate or none"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """Search and filter workflows with pagination."""
     try:
+        generation, last_indexed = await run_db(db.get_index_state)
+        headers = index_headers("search", generation, last_indexed)
+        unchanged = not_modified(if_none_match, headers)
+        if unchanged is not None:
+            return unchanged
+        cache_key = ("workflows", q, match, trigger, complexity, active_only, integration, category, node_type,
+                     sort, order, min_depth, max_depth, min_fan_out, min_branches, has_cycles, has_disconnected,
+                     page, per_page, cursor, total)
+        cached = query_cache.get(cache_key, generation)
+        if cached is not None:
+            return Response(cached, media_type="application/json", headers=headers)
+        
         offset = (page - 1) * per_page
         
-        workflows, total = db.search_workflows(
+        metric_min, metric_max = metric_bounds(
+            min_depth, max_depth, min_fan_out, min_branches, has_cycles, has_disconnected
+        )
+        
+        result = await run_db(
+            db.search_page,
             query=q,
             trigger_filter=trigger,
             complexity_filter=complexity,
             active_only=active_only,
             limit=per_page,
-            offset=offset
+            offset=offset,
+            integration_filter=integration,
+            category_filter=category,
+            node_type_filter=node_type,
+            cursor=cursor,
+            total_mode=total,
+            match=match,
+            sort=sort,
+            descending=order == "desc",
+            metric_min=metric_min,
+            metric_max=metric_max
         )
-        
-        # Convert to Pydantic models with error handling
-        workflow_summaries = []
-        for workflow in workflows:
-            try:
-                # Remove extra fields that aren't in the model
-                clean_workflow = {
-                    'id': workflow.get('id'),
-                    'filename': workflow.get('filename', ''),
-                    'name': workflow.get('name', ''),
-                    'active': workflow.get('active', False),
-                    'description': workflow.get('description', ''),
-                    'trigger_type': workflow.get('trigger_type', 'Manual'),
-                    'complexity': workflow.get('complexity', 'low'),
-                    'node_count': workflow.get('node_count', 0),
-                    'integrations': workflow.get('integrations', []),
-                    'tags': workflow.get('tags', []),
-                    'created_at': workflow.get('created_at'),
-                    'updated_at': workflow.get('updated_at')
-                }
-                workflow_summaries.append(WorkflowSummary(**clean_workflow))
-            except Exception as e:
-                print(f"Error converting workflow {workflow.get('filename', 'unknown')}: {e}")
-                # Continue with other workflows instead of failing completely
-                continue
-        
-        pages = (total + per_page - 1) // per_page  # Ceiling division
-        
-        return SearchResponse(
-            workflows=workflow_summaries,
-            total=total,
+        body = search_response_body(
+            result,
             page=page,
             per_page=per_page,
-            pages=pages,
             query=q,
             filters={
+                "match": match,
                 "trigger": trigger,
                 "complexity": complexity,
-                "active_only": active_only
+                "active_only": active_only,
+                "integration": integration,
+                "category": category,
+                "node_type": node_type,
+                "sort": sort,
+                "order": order,
+                "min_depth": min_depth,
+                "max_depth": max_depth,
+                "min_fan_out": min_fan_out,
+                "min_branches": min_branches,
+                "has_cycles": has_cycles,
+                "has_disconnected": has_disconnected
             }
         )
+        query_cache.put(cache_key, generation, body)
+        return Response(body, media_type="application/json", headers=headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching workflows: {str(e)}")
 
+@app.get("/api/facets", response_model=FacetsResponse)
+async def get_facets(
+    q: str = Query("", description="Search query"),
+    match: str = Query("fts", pattern="^(fts|substring|fuzzy)$", description="How q matches (as on /api/workflows)"),
+    trigger: str = Query("all", description="Filter by trigger type"),
+    complexity: str = Query("all", description="Filter by complexity"),
+    active_only: bool = Query(False, description="Show only active workflows"),
+    integration: str = Query("all", description="Filter by integration (e.g. Slack)"),
+    category: str = Query("all", description="Filter by service category (e.g. messaging)"),
+    node_type: str = Query("all", description="Filter by node type (e.g. n8n-nodes-base.code)"),
+    min_depth: Optional[int] = Query(None, ge=0, description="Minimum longest path, in connections"),
+    max_depth: Optional[int] = Query(None, ge=0, description="Maximum longest path, in connections"),
+    min_fan_out: Optional[int] = Query(None, ge=0, description="Minimum nodes fed by a single node"),
+    min_branches: Optional[int] = Query(None, ge=0, description="Minimum number of branching nodes"),
+    has_cycles: Optional[bool] = Query(None, description="Only workflows with (true) or without (false) loops"),
+    has_disconnected: Optional[bool] = Query(None, description="Only workflows with (true) or without (false) unconnected nodes"),
+    integration_limit: int = Query(20, ge=1, le=500, description="Most common integrations to count"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Result counts per trigger, complexity, active, integration and category for a search.
+    
+    Each facet's counts apply every filter except its own, so they show what
+    choosing another value in that facet would return.
+    """
+    try:
+        generation, last_indexed = await run_db(db.get_index_state)
+        headers = index_headers("facets", generation, last_indexed)
+        unchanged = not_modified(if_none_match, headers)
+        if unchanged is not None:
+            return unchanged
+        cache_key = ("facets", q, match, trigger, complexity, active_only, integration, category, node_type,
+                     min_depth, max_depth, min_fan_out, min_branches, has_cycles, has_disconnected,
+                     integration_limit)
+        cached = query_cache.get(cache_key, generation)
+        if cached is not None:
+            return Response(cached, media_type="application/json", headers=headers)
+        
+        metric_min, metric_max = metric_bounds(
+            min_depth, max_depth, min_fan_out, min_branches, has_cycles, has_disconnected
+        )
+        result = await run_db(
+            db.search_facets,
+            query=q,
+            trigger_filter=trigger,
+            complexity_filter=complexity,
+            active_only=active_only,
+            integration_filter=integration,
+            category_filter=category,
+            node_type_filter=node_type,
+            metric_min=metric_min,
+            metric_max=metric_max,
+            match=match,
+            integration_limit=integration_limit
+        )
+        body = dump_json({"total": result["total"], "query": q, "facets": result["facets"]})
+        query_cache.put(cache_key, generation, body)
+        return Response(body, media_type="application/json", headers=headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error counting facets: {str(e)}")
+
 @app.get("/api/workflows/{filename}")
-async def get_workflow_detail(filename: str):
+async def get_workflow_detail(filename: str, if_none_match: Optional[str] = Header(None)):
     """Get detailed workflow information including raw JSON."""
     try:
         # Get workflow metadata from database
-        workflows, _ = db.search_workflows(f'filename:"{filename}"', limit=1)
-        if not workflows:
+        workflow_meta = await run_db(db.get_workflow, filename)
+        if workflow_meta is None:
             raise HTTPException(status_code=404, detail="Workflow not found in database")
         
-        workflow_meta = workflows[0]
+        # Metadata and raw JSON both follow from the file content
+        headers = workflow_headers("detail", workflow_meta, weak=True)
+        unchanged = not_modified(if_none_match, headers)
+        if unchanged is not None:
+            return unchanged
+        
+        # Served from the database when the indexer stored the file; the stored
+        # bytes are already valid JSON, so they're spliced in without a parse
+        content_gz = await run_db(db.get_workflow_content, workflow_meta['file_hash'])
+        if content_gz is not None:
+            raw = await run_file(gzip.decompress, content_gz)
+            body = b'{"metadata":' + dump_json(workflow_meta) + b',"raw_json":' + raw + b'}'
+            return Response(body, media_type="application/json", headers=headers)
         
         # Load raw JSON from file
         file_path = os.path.join("workflows", filename)
@@ -210,23 +745,58 @@ async def get_workflow_detail(filename: str):
             print(f"Warning: File {file_path} not found on filesystem but exists in database")
             raise HTTPException(status_code=404, detail=f"Workflow file '{filename}' not found on filesystem")
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            raw_json = json.load(f)
+        raw_json = await run_file(load_workflow_json, file_path)
         
-        return {
+        return JSONResponse({
             "metadata": workflow_meta,
             "raw_json": raw_json
-        }
+        }, headers=headers)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading workflow: {str(e)}")
 
 @app.get("/api/workflows/{filename}/download")
-async def download_workflow(filename: str):
+async def download_workflow(
+    filename: str,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="range")
+):
     """Download workflow JSON file."""
     try:
         file_path = os.path.join("workflows", filename)
+        
+        # Indexed files are validated by content hash; others keep FileResponse's stat-based ETag
+        headers = {"Cache-Control": CACHE_CONTROL["download"]}
+        workflow = await run_db(db.get_workflow, filename)
+        if workflow is not None:
+            headers = workflow_headers("download", workflow)
+            unchanged = not_modified(if_none_match, headers)
+            if unchanged is not None:
+                return unchanged
+            headers["Vary"] = "Accept-Encoding"
+            
+            # Send a compressed copy stored by the indexer as-is; Range requests get
+            # the plain file below, which FileResponse can slice
+            for encoding in ("br", "gzip"):
+                if range_header is not None or not accepts_encoding(accept_encoding, encoding):
+                    continue
+                content = await run_db(db.get_workflow_content, workflow['file_hash'], encoding)
+                if content is not None:
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Disposition"] = content_disposition(filename)
+                    headers["ETag"] = "W/" + headers["ETag"]
+                    return Response(content, media_type="application/json", headers=headers)
+            
+            # Without the workflows/ checkout, decompress the stored copy
+            if not os.path.exists(file_path):
+                content_gz = await run_db(db.get_workflow_content, workflow['file_hash'])
+                if content_gz is not None:
+                    headers["Content-Disposition"] = content_disposition(filename)
+                    content = await run_file(gzip.decompress, content_gz)
+                    return Response(content, media_type="application/json", headers=headers)
+        
         if not os.path.exists(file_path):
             print(f"Warning: Download requested for missing file: {file_path}")
             raise HTTPException(status_code=404, detail=f"Workflow file '{filename}' not found on filesystem")
@@ -234,8 +804,11 @@ async def download_workflow(filename: str):
         return FileResponse(
             file_path,
             media_type="application/json",
-            filename=filename
+            filename=filename,
+            headers=headers
         )
+    except HTTPException:
+        raise
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Workflow file '{filename}' not found")
     except Exception as e:
@@ -243,128 +816,191 @@ async def download_workflow(filename: str):
         raise HTTPException(status_code=500, detail=f"Error downloading workflow: {str(e)}")
 
 @app.get("/api/workflows/{filename}/diagram")
-async def get_workflow_diagram(filename: str):
+async def get_workflow_diagram(filename: str, if_none_match: Optional[str] = Header(None)):
     """Get Mermaid diagram code for workflow visualization."""
     try:
-        file_path = os.path.join("workflows", filename)
-        if not os.path.exists(file_path):
-            print(f"Warning: Diagram requested for missing file: {file_path}")
-            raise HTTPException(status_code=404, detail=f"Workflow file '{filename}' not found on filesystem")
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        result = await run_db(db.get_diagram, filename)
+        if result is None:
+            raise HTTPException(status_code=404, detail=f"Workflow '{filename}' not found in database")
         
-        nodes = data.get('nodes', [])
-        connections = data.get('connections', {})
+        # Diagrams only change with the file content; weak, since GZipMiddleware may
+        # encode the body per request (as for the detail route)
+        file_hash, diagram = result
+        if diagram is None:
+            # Not built by the indexer: read and render on the file executor, then store it
+            file_hash, diagram = await run_file(db.build_diagram, filename)
+            await run_db(db.store_diagram, file_hash, diagram)
+        headers = workflow_headers("diagram", {"file_hash": file_hash}, weak=True)
+        unchanged = not_modified(if_none_match, headers)
+        if unchanged is not None:
+            return unchanged
         
-        # Generate Mermaid diagram
-        diagram = generate_mermaid_diagram(nodes, connections)
-        
-        return {"diagram": diagram}
+        return JSONResponse({"diagram": diagram}, headers=headers)
     except HTTPException:
         raise
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Workflow file '{filename}' not found")
-    except json.JSONDecodeError as e:
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
         print(f"Error parsing JSON in {filename}: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Invalid JSON in workflow file: {str(e)}")
     except Exception as e:
         print(f"Error generating diagram for {filename}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating diagram: {str(e)}")
 
-def generate_mermaid_diagram(nodes: List[Dict], connections: Dict) -> str:
-    """Generate Mermaid.js flowchart code from workflow nodes and connections."""
-    if not nodes:
-        return "graph TD\n  EmptyWorkflow[No nodes found in workflow]"
-    
-    # Create mapping for node names to ensure valid mermaid IDs
-    mermaid_ids = {}
-    for i, node in enumerate(nodes):
-        node_id = f"node{i}"
-        node_name = node.get('name', f'Node {i}')
-        mermaid_ids[node_name] = node_id
-    
-    # Start building the mermaid diagram
-    mermaid_code = ["graph TD"]
-    
-    # Add nodes with styling
-    for node in nodes:
-        node_name = node.get('name', 'Unnamed')
-        node_id = mermaid_ids[node_name]
-        node_type = node.get('type', '').replace('n8n-nodes-base.', '')
+@app.get("/api/workflows/{filename}/similar", response_model=SimilarResponse)
+async def get_similar_workflows(
+    filename: str,
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of similar workflows"),
+    min_similarity: float = Query(0.5, ge=0, le=1, description="Minimum estimated structural similarity (0-1)"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get workflows with near-identical node types and wiring (MinHash/LSH over the index)."""
+    try:
+        generation, last_indexed = await run_db(db.get_index_state)
+        headers = index_headers("similar", generation, last_indexed)
+        unchanged = not_modified(if_none_match, headers)
+        if unchanged is not None:
+            return unchanged
+        cache_key = ("similar", filename, limit, min_similarity)
+        cached = query_cache.get(cache_key, generation)
+        if cached is not None:
+            return Response(cached, media_type="application/json", headers=headers)
         
-        # Determine node style based on type
-        style = ""
-        if any(x in node_type.lower() for x in ['trigger', 'webhook', 'cron']):
-            style = "fill:#b3e0ff,stroke:#0066cc"  # Blue for triggers
-        elif any(x in node_type.lower() for x in ['if', 'switch']):
-            style = "fill:#ffffb3,stroke:#e6e600"  # Yellow for conditional nodes
-        elif any(x in node_type.lower() for x in ['function', 'code']):
-            style = "fill:#d9b3ff,stroke:#6600cc"  # Purple for code nodes
-        elif 'error' in node_type.lower():
-            style = "fill:#ffb3b3,stroke:#cc0000"  # Red for error handlers
-        else:
-            style = "fill:#d9d9d9,stroke:#666666"  # Gray for other nodes
+        similar = await run_db(db.get_similar_workflows, filename, limit, min_similarity)
+        if similar is None:
+            raise HTTPException(status_code=404, detail=f"Workflow '{filename}' not found in database")
         
-        # Add node with label (escaping special characters)
-        clean_name = node_name.replace('"', "'")
-        clean_type = node_type.replace('"', "'")
-        label = f"{clean_name}<br>({clean_type})"
-        mermaid_code.append(f"  {node_id}[\"{label}\"]")
-        mermaid_code.append(f"  style {node_id} {style}")
-    
-    # Add connections between nodes
-    for source_name, source_connections in connections.items():
-        if source_name not in mermaid_ids:
-            continue
+        body = dump_json({
+            "filename": filename,
+            "workflows": [
+                {**workflow_summary(workflow), "similarity": workflow['similarity']}
+                for workflow in similar
+            ]
+        })
+        query_cache.put(cache_key, generation, body)
+        return Response(body, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error finding similar workflows: {str(e)}")
+
+@app.get("/api/workflows/{filename}/related", response_model=SimilarResponse)
+async def get_related_workflows(
+    filename: str,
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of related workflows"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get workflows with the most similar integrations, node types, tags and description (TF-IDF cosine)."""
+    if np is None:
+        raise HTTPException(status_code=503, detail="Related workflows need numpy (pip install numpy)")
+    try:
+        generation, last_indexed = await run_db(db.get_index_state)
+        headers = index_headers("related", generation, last_indexed)
+        unchanged = not_modified(if_none_match, headers)
+        if unchanged is not None:
+            return unchanged
+        cache_key = ("related", filename, limit)
+        cached = query_cache.get(cache_key, generation)
+        if cached is not None:
+            return Response(cached, media_type="application/json", headers=headers)
         
-        if isinstance(source_connections, dict) and 'main' in source_connections:
-            main_connections = source_connections['main']
-            
-            for i, output_connections in enumerate(main_connections):
-                if not isinstance(output_connections, list):
-                    continue
-                    
-                for connection in output_connections:
-                    if not isinstance(connection, dict) or 'node' not in connection:
-                        continue
-                        
-                    target_name = connection['node']
-                    if target_name not in mermaid_ids:
-                        continue
-                        
-                    # Add arrow with output index if multiple outputs
-                    label = f" -->|{i}| " if len(main_connections) > 1 else " --> "
-                    mermaid_code.append(f"  {mermaid_ids[source_name]}{label}{mermaid_ids[target_name]}")
-    
-    # Format the final mermaid diagram code
-    return "\n".join(mermaid_code)
+        workflow = await run_db(db.get_workflow, filename)
+        if workflow is None:
+            raise HTTPException(status_code=404, detail=f"Workflow '{filename}' not found in database")
+        matrix = await run_file(current_tfidf)
+        if matrix is None:
+            raise HTTPException(status_code=503, detail="TF-IDF matrix not built yet; run indexing first")
+        
+        scores = dict(await run_db(matrix.related, workflow['id'], limit))
+        related = await run_db(db.get_workflows_by_ids, list(scores))
+        body = dump_json({
+            "filename": filename,
+            "workflows": [
+                {**workflow_summary(item), "similarity": scores[item['id']]}
+                for item in related
+            ]
+        })
+        query_cache.put(cache_key, generation, body)
+        return Response(body, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error finding related workflows: {str(e)}")
 
 @app.post("/api/reindex")
 async def reindex_workflows(background_tasks: BackgroundTasks, force: bool = False):
     """Trigger workflow reindexing in the background."""
     def run_indexing():
         db.index_all_workflows(force_reindex=force)
+        suggest_state["index"] = db.build_suggest_index()
     
     background_tasks.add_task(run_indexing)
     return {"message": "Reindexing started in background"}
 
+@app.get("/api/suggest", response_model=SuggestResponse)
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100, description="Prefix typed so far"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum number of suggestions"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Autocomplete workflow names, integrations, node types and tags from an in-memory prefix index."""
+    refresh = suggest_state["refresh"]
+    if time.monotonic() - suggest_state["checked"] > SUGGEST_REFRESH_SECONDS and (refresh is None or refresh.done()):
+        suggest_state["refresh"] = asyncio.create_task(refresh_suggest_index())
+    index = suggest_state["index"] or await refresh_suggest_index()
+    
+    headers = index_headers("suggest", index.generation, index.last_indexed)
+    unchanged = not_modified(if_none_match, headers)
+    if unchanged is not None:
+        return unchanged
+    
+    body = dump_json({"query": q, "suggestions": index.suggest(q, limit)})
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/api/cache")
+async def get_cache_stats():
+    """Get search cache hit/miss counters."""
+    return query_cache.stats()
+
 @app.get("/api/integrations")
-async def get_integrations():
-    """Get list of all unique integrations."""
+async def get_integrations(if_none_match: Optional[str] = Header(None)):
+    """Get all integrations with their category and workflow counts."""
     try:
-        stats = db.get_stats()
-        # For now, return basic info. Could be enhanced to return detailed integration stats
-        return {"integrations": [], "count": stats['unique_integrations']}
+        headers = index_headers("integrations", *await run_db(db.get_index_state))
+        unchanged = not_modified(if_none_match, headers)
+        if unchanged is not None:
+            return unchanged
+        
+        integrations = await run_db(db.get_integrations)
+        return JSONResponse({"integrations": integrations, "count": len(integrations)}, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching integrations: {str(e)}")
 
+@app.get("/api/node-types")
+async def get_node_types(if_none_match: Optional[str] = Header(None)):
+    """Get all node types with the number of workflows using each and their total node count."""
+    try:
+        headers = index_headers("node_types", *await run_db(db.get_index_state))
+        unchanged = not_modified(if_none_match, headers)
+        if unchanged is not None:
+            return unchanged
+        
+        node_types = await run_db(db.get_node_types)
+        return JSONResponse({"node_types": node_types, "count": len(node_types)}, headers=headers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching node types: {str(e)}")
+
 @app.get("/api/categories")
-async def get_categories():
+async def get_categories(if_none_match: Optional[str] = Header(None)):
     """Get available service categories for filtering."""
     try:
+        headers = index_headers("categories", *await run_db(db.get_index_state))
+        unchanged = not_modified(if_none_match, headers)
+        if unchanged is not None:
+            return unchanged
+        
         categories = db.get_service_categories()
-        return {"categories": categories}
+        return JSONResponse({"categories": categories}, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching categories: {str(e)}")
 
@@ -372,52 +1008,46 @@ async def get_categories():
 async def search_workflows_by_category(
     category: str,
     page: int = Query(1, ge=1, description="Page number"),
-    per_page: int = Query(20, ge=1, le=100, description="Items per page")
+    per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from the previous page (overrides page)"),
+    total: str = Query("exact", pattern="^(exact|estimate|none)$", description="How to count matches: exact, estimate or none"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """Search workflows by service category (messaging, database, ai_ml, etc.)."""
     try:
-        offset = (page - 1) * per_page
+        generation, last_indexed = await run_db(db.get_index_state)
+        headers = index_headers("search", generation, last_indexed)
+        unchanged = not_modified(if_none_match, headers)
+        if unchanged is not None:
+            return unchanged
+        cache_key = ("category", category, page, per_page, cursor, total)
+        cached = query_cache.get(cache_key, generation)
+        if cached is not None:
+            return Response(cached, media_type="application/json", headers=headers)
         
-        workflows, total = db.search_by_category(
-            category=category,
-            limit=per_page,
-            offset=offset
-        )
-        
-        # Convert to Pydantic models with error handling
-        workflow_summaries = []
-        for workflow in workflows:
-            try:
-                clean_workflow = {
-                    'id': workflow.get('id'),
-                    'filename': workflow.get('filename', ''),
-                    'name': workflow.get('name', ''),
-                    'active': workflow.get('active', False),
-                    'description': workflow.get('description', ''),
-                    'trigger_type': workflow.get('trigger_type', 'Manual'),
-                    'complexity': workflow.get('complexity', 'low'),
-                    'node_count': workflow.get('node_count', 0),
-                    'integrations': workflow.get('integrations', []),
-                    'tags': workflow.get('tags', []),
-                    'created_at': workflow.get('created_at'),
-                    'updated_at': workflow.get('updated_at')
-                }
-                workflow_summaries.append(WorkflowSummary(**clean_workflow))
-            except Exception as e:
-                print(f"Error converting workflow {workflow.get('filename', 'unknown')}: {e}")
-                continue
-        
-        pages = (total + per_page - 1) // per_page
+        offset = (page - 1) * per_page
         
-        return SearchResponse(
-            workflows=workflow_summaries,
-            total=total,
+        result = {'workflows': [], 'total': 0, 'total_exact': True, 'next_cursor': None}
+        if category in db.get_service_categories():
+            result = await run_db(
+                db.search_page,
+                category_filter=category,
+                limit=per_page,
+                offset=offset,
+                cursor=cursor,
+                total_mode=total
+            )
+        body = search_response_body(
+            result,
             page=page,
             per_page=per_page,
-            pages=pages,
             query=f"category:{category}",
             filters={"category": category}
         )
+        query_cache.put(cache_key, generation, body)
+        return Response(body, media_type="application/json", headers=headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching by category: {str(e)}")
 
@@ -432,7 +1062,7 @@ async def global_exception_handler(request, exc):
 # Mount static files AFTER all routes are defined
 static_dir = Path("static")
 if static_dir.exists():
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
     print(f"✅ Static files mounted from {static_dir.absolute()}")
 else:
     print(f"❌ Warning: Static directory not found at {static_dir.absolute()}")
@@ -443,6 +1073,38 @@ def create_static_directory():
     static_dir.mkdir(exist_ok=True)
     return static_dir
 
+def benchmark_serialization(per_page: int = 100, repeat: int = 200):
+    """Time serializing one search page: per-row Pydantic models vs. the fast path."""
+    from pydantic import TypeAdapter
+    
+    result = db.search_page(limit=per_page)
+    response_adapter = TypeAdapter(SearchResponse)
+    filters = {"trigger": "all", "complexity": "all", "active_only": False, "integration": "all"}
+    
+    def legacy():
+        # What the routes did before: a model per row, then FastAPI's response_model pass
+        summaries = [WorkflowSummary(**workflow_summary(workflow)) for workflow in result['workflows']]
+        response = SearchResponse(
+            workflows=summaries, total=result['total'], page=1, per_page=per_page,
+            pages=(result['total'] + per_page - 1) // per_page, query="", filters=filters,
+            next_cursor=result['next_cursor'], total_exact=result['total_exact']
+        )
+        content = response_adapter.dump_python(response_adapter.validate_python(response), mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    
+    def fast():
+        return search_response_body(result, page=1, per_page=per_page, query="", filters=filters)
+    
+    assert json.loads(legacy()) == json.loads(fast())
+    print(f"Serializing {len(result['workflows'])} workflows per page "
+          f"({'orjson' if orjson is not None else 'pydantic_core'} fast path):")
+    for label, func in (("models", legacy), ("fast", fast)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"  {label:<6} {elapsed * 1e3:7.3f} ms/page")
+
 def run_server(host: str = "127.0.0.1", port: int = 8000, reload: bool = False):
     """Run the FastAPI server."""
     # Ensure static directory exists
@@ -496,7 +1158,11 @@ if __name__ == "__main__":
     parser.add_argument('--host', default='127.0.0.1', help='Host to bind to')
     parser.add_argument('--port', type=int, default=8000, help='Port to bind to')
     parser.add_argument('--reload', action='store_true', help='Enable auto-reload for development')
+    parser.add_argument('--benchmark', action='store_true', help='Benchmark search response serialization (per_page=100) and exit')
     
     args = parser.parse_args()
     
-    run_server(host=args.host, port=args.port, reload=args.reload)
\ No newline at end of file
+    if args.benchmark:
+        benchmark_serialization()
+    else:
+        run_server(host=args.host, port=args.port, reload=args.reload)
\ No newline at end of file
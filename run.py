@@ -54,7 +54,7 @@ def setup_directories():
     print("✅ Directories verified")
 
 
-def setup_database(force_reindex: bool = False) -> str:
+def setup_database(force_reindex: bool = False, workers: int = None) -> str:
     """Setup and initialize the database."""
     from workflow_db import WorkflowDatabase
     
@@ -67,7 +67,7 @@ def setup_database(force_reindex: bool = False) -> str:
     stats = db.get_stats()
     if stats['total'] == 0 or force_reindex:
         print("📚 Indexing workflows...")
-        index_stats = db.index_all_workflows(force_reindex=True)
+        index_stats = db.index_all_workflows(force_reindex=True, workers=workers)
         print(f"✅ Indexed {index_stats['processed']} workflows")
         
         # Show final stats
@@ -114,6 +114,7 @@ Examples:
   python run.py --port 3000        # Start on port 3000
   python run.py --host 0.0.0.0     # Accept external connections
   python run.py --reindex          # Force database reindexing
+  python run.py --reindex --workers 8  # Reindex with 8 worker processes
   python run.py --dev              # Development mode with auto-reload
         """
     )
@@ -134,6 +135,11 @@ Examples:
         action="store_true", 
         help="Force database reindexing"
     )
+    parser.add_argument(
+        "--workers", 
+        type=int, 
+        help="Worker processes for indexing (default: CPU count)"
+    )
     parser.add_argument(
         "--dev", 
         action="store_true", 
@@ -153,7 +159,7 @@ Examples:
     
     # Setup database
     try:
-        setup_database(force_reindex=args.reindex)
+        setup_database(force_reindex=args.reindex, workers=args.workers)
     except Exception as e:
         print(f"❌ Database setup error: {e}")
         sys.exit(1)
@@ -7,99 +7,1209 @@ SQLite-based workflow indexer and search engine for instant performance.
 import sqlite3
 import json
 import os
-import glob
 import datetime
 import hashlib
+import gzip
+import base64
+import bisect
+import heapq
+import time
+import re
+import functools
+import multiprocessing
+import queue
+import struct
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 
+try:
+    import brotli  # optional; adds brotli copies of stored workflow content
+except ImportError:
+    brotli = None
+
+try:
+    import numpy as np  # optional; enables the TF-IDF "related workflows" matrix
+except ImportError:
+    np = None
+
+# Below this many changed files a process pool costs more to start than it saves
+PARALLEL_INDEX_MIN_FILES = 64
+
+# Rows per executemany() when storing analyzed workflows
+INDEX_BATCH_SIZE = 500
+
+# Read connections kept open per WorkflowDatabase (override with WORKFLOW_DB_POOL_SIZE)
+DEFAULT_POOL_SIZE = 8
+
+# Per-connection page cache (pages) and memory-mapped I/O window (bytes)
+CACHE_SIZE_PAGES = 10000
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+
+# total='estimate' stops counting matches after this many rows
+TOTAL_ESTIMATE_CAP = 1000
+
+# gzip level (and brotli quality, when brotli is installed) for workflow file content stored in the database
+CONTENT_COMPRESS_LEVEL = 6
+CONTENT_BROTLI_QUALITY = 9
+
+# MinHash signature length and its split into LSH bands (rows per band = permutations / bands).
+# 16 bands of 4 rows make workflows about 50% alike in structure likely to share a bucket.
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+
+# Estimated Jaccard similarity at which the dedupe report groups workflows
+DEDUPE_THRESHOLD = 0.8
+
+# workflows_fts columns in table order with their bm25 weights (name > integrations > tags > description),
+# and the prefix lengths FTS5 indexes so short prefix queries like goog* don't scan the term list
+FTS_COLUMN_WEIGHTS = [('filename', 2.0), ('name', 10.0), ('description', 1.0), ('integrations', 5.0), ('tags', 3.0)]
+FTS_PREFIX_LENGTHS = '2 3 4'
+
+# Text matching modes of search_page: FTS5 tokens, or the trigram side table (substring or fuzzy)
+MATCH_MODES = ('fts', 'substring', 'fuzzy')
+
+# Suggestion prefixes this short are answered from precomputed top lists instead of a range scan
+SUGGEST_PRECOMPUTED_PREFIX = 2
+
+# Description words that become TF-IDF terms (lowercased, at least three characters, no bare numbers)
+DESCRIPTION_TOKEN = re.compile(r'[a-z][a-z0-9]{2,}')
+
+# Bumped whenever _migrate_schema learns a new upgrade step (stored in PRAGMA user_version)
+SCHEMA_VERSION = 13
+
+# Enhanced service mapping for better recognition
+SERVICE_MAPPINGS = {
+    # Messaging & Communication
+    'telegram': 'Telegram',
+    'telegramTrigger': 'Telegram',
+    'discord': 'Discord',
+    'slack': 'Slack', 
+    'whatsapp': 'WhatsApp',
+    'mattermost': 'Mattermost',
+    'teams': 'Microsoft Teams',
+    'rocketchat': 'Rocket.Chat',
+
+    # Email
+    'gmail': 'Gmail',
+    'mailjet': 'Mailjet',
+    'emailreadimap': 'Email (IMAP)',
+    'emailsendsmt': 'Email (SMTP)',
+    'outlook': 'Outlook',
+
+    # Cloud Storage
+    'googledrive': 'Google Drive',
+    'googledocs': 'Google Docs',
+    'googlesheets': 'Google Sheets',
+    'dropbox': 'Dropbox',
+    'onedrive': 'OneDrive',
+    'box': 'Box',
+
+    # Databases
+    'postgres': 'PostgreSQL',
+    'mysql': 'MySQL',
+    'mongodb': 'MongoDB',
+    'redis': 'Redis',
+    'airtable': 'Airtable',
+    'notion': 'Notion',
+
+    # Project Management
+    'jira': 'Jira',
+    'github': 'GitHub',
+    'gitlab': 'GitLab',
+    'trello': 'Trello',
+    'asana': 'Asana',
+    'mondaycom': 'Monday.com',
+
+    # AI/ML Services
+    'openai': 'OpenAI',
+    'anthropic': 'Anthropic',
+    'huggingface': 'Hugging Face',
+
+    # Social Media
+    'linkedin': 'LinkedIn',
+    'twitter': 'Twitter/X',
+    'facebook': 'Facebook',
+    'instagram': 'Instagram',
+
+    # E-commerce
+    'shopify': 'Shopify',
+    'stripe': 'Stripe',
+    'paypal': 'PayPal',
+
+    # Analytics
+    'googleanalytics': 'Google Analytics',
+    'mixpanel': 'Mixpanel',
+
+    # Calendar & Tasks
+    'googlecalendar': 'Google Calendar', 
+    'googletasks': 'Google Tasks',
+    'cal': 'Cal.com',
+    'calendly': 'Calendly',
+
+    # Forms & Surveys
+    'typeform': 'Typeform',
+    'googleforms': 'Google Forms',
+    'form': 'Form Trigger',
+
+    # Development Tools
+    'webhook': 'Webhook',
+    'httpRequest': 'HTTP Request',
+    'graphql': 'GraphQL',
+    'sse': 'Server-Sent Events',
+
+    # Utility nodes (exclude from integrations)
+    'set': None,
+    'function': None,
+    'code': None,
+    'if': None,
+    'switch': None,
+    'merge': None,
+    'split': None,
+    'stickynote': None,
+    'stickyNote': None,
+    'wait': None,
+    'schedule': None,
+    'cron': None,
+    'manual': None,
+    'stopanderror': None,
+    'noop': None,
+    'noOp': None,
+    'error': None,
+    'limit': None,
+    'aggregate': None,
+    'summarize': None,
+    'filter': None,
+    'sort': None,
+    'removeDuplicates': None,
+    'dateTime': None,
+    'extractFromFile': None,
+    'convertToFile': None,
+    'readBinaryFile': None,
+    'readBinaryFiles': None,
+    'executionData': None,
+    'executeWorkflow': None,
+    'executeCommand': None,
+    'respondToWebhook': None,
+}
+
+# Keys that can occur in a lowercased node name, in SERVICE_MAPPINGS priority order
+_NAME_HINT_KEYS = [key for key, value in SERVICE_MAPPINGS.items() if value and key == key.lower()]
+_NAME_HINT_PRIORITY = {key: i for i, key in enumerate(_NAME_HINT_KEYS)}
+
+# The zero-width lookahead is tried at every position of the name and the alternation
+# picks the highest-priority key starting there, so the lowest priority over all matches
+# is the first SERVICE_MAPPINGS key contained in the name.
+_NAME_HINT_PATTERN = re.compile('(?=(' + '|'.join(map(re.escape, _NAME_HINT_KEYS)) + '))')
+
+
+@functools.lru_cache(maxsize=8192)
+def _match_service_in_name(node_name: str) -> Optional[str]:
+    """Return the service hinted at by a lowercased node name, if any."""
+    best = None
+    for match in _NAME_HINT_PATTERN.finditer(node_name):
+        priority = _NAME_HINT_PRIORITY[match.group(1)]
+        if best is None or priority < best:
+            best = priority
+            if best == 0:
+                break
+    return SERVICE_MAPPINGS[_NAME_HINT_KEYS[best]] if best is not None else None
+
+
+@functools.lru_cache(maxsize=None)
+def _classify_node_type(node_type: str) -> Tuple[Optional[str], Optional[str]]:
+    """Return (trigger hint, service name) for a node type.
+    
+    The trigger hint is 'webhook', 'scheduled', 'trigger' (any other non-manual
+    trigger) or None. Node types repeat heavily across workflows, so this is cached.
+    """
+    node_type_lower = node_type.lower()
+    if 'webhook' in node_type_lower:
+        trigger_hint = 'webhook'
+    elif 'cron' in node_type_lower or 'schedule' in node_type_lower:
+        trigger_hint = 'scheduled'
+    elif 'trigger' in node_type_lower and 'manual' not in node_type_lower:
+        trigger_hint = 'trigger'
+    else:
+        trigger_hint = None
+    
+    service_name = None
+    
+    # Handle n8n-nodes-base nodes
+    if node_type.startswith('n8n-nodes-base.'):
+        raw_service = node_type.replace('n8n-nodes-base.', '').lower()
+        raw_service = raw_service.replace('trigger', '')
+        service_name = SERVICE_MAPPINGS.get(raw_service, raw_service.title() if raw_service else None)
+    
+    # Handle @n8n/ namespaced nodes
+    elif node_type.startswith('@n8n/'):
+        raw_service = node_type.split('.')[-1].lower() if '.' in node_type else node_type.lower()
+        raw_service = raw_service.replace('trigger', '')
+        service_name = SERVICE_MAPPINGS.get(raw_service, raw_service.title() if raw_service else None)
+    
+    # Handle custom nodes
+    elif '-' in node_type:
+        # Try to extract service name from custom node names like "n8n-nodes-youtube-transcription-kasha.youtubeTranscripter"
+        parts = node_type_lower.split('.')
+        for part in parts:
+            if 'youtube' in part:
+                service_name = 'YouTube'
+                break
+            elif 'telegram' in part:
+                service_name = 'Telegram'
+                break
+            elif 'discord' in part:
+                service_name = 'Discord'
+                break
+    
+    return trigger_hint, service_name
+
+
+# Service categories for enhanced filtering; each integration belongs to at most one
+SERVICE_CATEGORIES = {
+    'messaging': ['Telegram', 'Discord', 'Slack', 'WhatsApp', 'Mattermost', 'Microsoft Teams', 'Rocket.Chat'],
+    'email': ['Gmail', 'Mailjet', 'Email (IMAP)', 'Email (SMTP)', 'Outlook'],
+    'cloud_storage': ['Google Drive', 'Google Docs', 'Google Sheets', 'Dropbox', 'OneDrive', 'Box'],
+    'database': ['PostgreSQL', 'MySQL', 'MongoDB', 'Redis', 'Airtable', 'Notion'],
+    'project_management': ['Jira', 'GitHub', 'GitLab', 'Trello', 'Asana', 'Monday.com'],
+    'ai_ml': ['OpenAI', 'Anthropic', 'Hugging Face'],
+    'social_media': ['LinkedIn', 'Twitter/X', 'Facebook', 'Instagram'],
+    'ecommerce': ['Shopify', 'Stripe', 'PayPal'],
+    'analytics': ['Google Analytics', 'Mixpanel'],
+    'calendar_tasks': ['Google Calendar', 'Google Tasks', 'Cal.com', 'Calendly'],
+    'forms': ['Typeform', 'Google Forms', 'Form Trigger'],
+    'development': ['Webhook', 'HTTP Request', 'GraphQL', 'Server-Sent Events', 'YouTube']
+}
+
+# Keyed by lowercased name: analyze_nodes can produce e.g. 'Youtube' for 'YouTube'
+INTEGRATION_CATEGORIES = {
+    service.lower(): category
+    for category, services in SERVICE_CATEGORIES.items()
+    for service in services
+}
+
+
+def get_integration_category(integration: str) -> Optional[str]:
+    """Return the service category of an integration name, if it has one."""
+    return INTEGRATION_CATEGORIES.get(integration.lower())
+
+
+def generate_mermaid_diagram(nodes: List[Dict], connections: Dict) -> str:
+    """Generate Mermaid.js flowchart code from workflow nodes and connections."""
+    if not nodes:
+        return "graph TD\n  EmptyWorkflow[No nodes found in workflow]"
+    
+    # Create mapping for node names to ensure valid mermaid IDs
+    mermaid_ids = {}
+    for i, node in enumerate(nodes):
+        node_id = f"node{i}"
+        node_name = node.get('name', f'Node {i}')
+        mermaid_ids[node_name] = node_id
+    
+    # Start building the mermaid diagram
+    mermaid_code = ["graph TD"]
+    
+    # Add nodes with styling
+    for node in nodes:
+        node_name = node.get('name', 'Unnamed')
+        node_id = mermaid_ids[node_name]
+        node_type = node.get('type', '').replace('n8n-nodes-base.', '')
+        
+        # Determine node style based on type
+        style = ""
+        if any(x in node_type.lower() for x in ['trigger', 'webhook', 'cron']):
+            style = "fill:#b3e0ff,stroke:#0066cc"  # Blue for triggers
+        elif any(x in node_type.lower() for x in ['if', 'switch']):
+            style = "fill:#ffffb3,stroke:#e6e600"  # Yellow for conditional nodes
+        elif any(x in node_type.lower() for x in ['function', 'code']):
+            style = "fill:#d9b3ff,stroke:#6600cc"  # Purple for code nodes
+        elif 'error' in node_type.lower():
+            style = "fill:#ffb3b3,stroke:#cc0000"  # Red for error handlers
+        else:
+            style = "fill:#d9d9d9,stroke:#666666"  # Gray for other nodes
+        
+        # Add node with label (escaping special characters)
+        clean_name = node_name.replace('"', "'")
+        clean_type = node_type.replace('"', "'")
+        label = f"{clean_name}<br>({clean_type})"
+        mermaid_code.append(f"  {node_id}[\"{label}\"]")
+        mermaid_code.append(f"  style {node_id} {style}")
+    
+    # Add connections between nodes
+    for source_name, source_connections in connections.items():
+        if source_name not in mermaid_ids:
+            continue
+        
+        if isinstance(source_connections, dict) and 'main' in source_connections:
+            main_connections = source_connections['main']
+            
+            for i, output_connections in enumerate(main_connections):
+                if not isinstance(output_connections, list):
+                    continue
+                    
+                for connection in output_connections:
+                    if not isinstance(connection, dict) or 'node' not in connection:
+                        continue
+                        
+                    target_name = connection['node']
+                    if target_name not in mermaid_ids:
+                        continue
+                        
+                    # Add arrow with output index if multiple outputs
+                    label = f" -->|{i}| " if len(main_connections) > 1 else " --> "
+                    mermaid_code.append(f"  {mermaid_ids[source_name]}{label}{mermaid_ids[target_name]}")
+    
+    # Format the final mermaid diagram code
+    return "\n".join(mermaid_code)
+
+
+def count_node_types(nodes: List[Dict]) -> Dict[str, int]:
+    """Count the nodes of each ``type`` in a workflow's node list."""
+    counts = {}
+    if not isinstance(nodes, list):
+        return counts
+    for node in nodes:
+        if isinstance(node, dict) and isinstance(node.get('type'), str) and node['type']:
+            counts[node['type']] = counts.get(node['type'], 0) + 1
+    return counts
+
+
+# Sort keys accepted by search_page besides relevance/recent, and their columns
+SORT_COLUMNS = {
+    'depth': 'graph_depth',
+    'fan_out': 'max_fan_out',
+    'branches': 'branch_count',
+    'disconnected': 'disconnected_nodes',
+    'cycles': 'cycle_count',
+    'nodes': 'node_count',
+}
+
+# Annotation-only nodes, left out of the graph metrics
+GRAPH_IGNORED_NODE_TYPES = {'n8n-nodes-base.stickyNote'}
+
+# Precomputed per-workflow graph metrics (workflows columns), in analyze_graph order
+GRAPH_METRIC_COLUMNS = ['graph_depth', 'max_fan_out', 'branch_count', 'disconnected_nodes', 'cycle_count']
+
+
+def _strongly_connected_components(successors: Dict[str, set]) -> List[List[str]]:
+    """Tarjan's algorithm, iterative; components come out sinks first (reverse topological order)."""
+    index, lowlink = {}, {}
+    stack, on_stack = [], set()
+    components = []
+    
+    for root in successors:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors[root]))]
+        
+        while work:
+            node, successor_iter = work[-1]
+            for successor in successor_iter:
+                if successor not in index:
+                    index[successor] = lowlink[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(successors[successor])))
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    
+    return components
+
+
+def analyze_graph(nodes: List[Dict], connections: Dict) -> Tuple[List[Tuple[str, str, str, int]], Dict[str, int]]:
+    """Extract a workflow's connection edges and compute its graph metrics.
+    
+    Edges are (source, target, connection type, output index) between named
+    nodes, for every connection type (``main`` and the ``ai_*`` ones). The
+    metrics leave sticky notes out:
+    
+    - ``graph_depth``: edges on the longest path, each cycle counting as one step
+    - ``max_fan_out``: most distinct nodes fed by a single node
+    - ``branch_count``: nodes feeding more than one node
+    - ``disconnected_nodes``: nodes with no connections (0 for single-node workflows)
+    - ``cycle_count``: groups of nodes that loop back on themselves
+    """
+    node_types = {}
+    if isinstance(nodes, list):
+        for node in nodes:
+            if isinstance(node, dict) and isinstance(node.get('name'), str):
+                node_types[node['name']] = node.get('type')
+    
+    edges = set()
+    if isinstance(connections, dict):
+        for source, outputs in connections.items():
+            if source not in node_types or not isinstance(outputs, dict):
+                continue
+            for connection_type, output_list in outputs.items():
+                if not isinstance(output_list, list):
+                    continue
+                for output_index, targets in enumerate(output_list):
+                    for target in targets if isinstance(targets, list) else []:
+                        if isinstance(target, dict) and target.get('node') in node_types:
+                            edges.add((source, target['node'], connection_type, output_index))
+    
+    successors = {name: set() for name, node_type in node_types.items() if node_type not in GRAPH_IGNORED_NODE_TYPES}
+    connected = set()
+    for source, target, _, _ in edges:
+        if source in successors and target in successors:
+            successors[source].add(target)
+            connected.update((source, target))
+    
+    # Longest path over the condensation: each component's depth builds on its
+    # successors', which Tarjan has always emitted already
+    components = _strongly_connected_components(successors)
+    component_of = {member: i for i, component in enumerate(components) for member in component}
+    depths = [0] * len(components)
+    for i, component in enumerate(components):
+        for member in component:
+            for successor in successors[member]:
+                j = component_of[successor]
+                if j != i:
+                    depths[i] = max(depths[i], depths[j] + 1)
+    
+    fan_outs = [len(targets) for targets in successors.values()]
+    metrics = {
+        'graph_depth': max(depths, default=0),
+        'max_fan_out': max(fan_outs, default=0),
+        'branch_count': sum(1 for fan_out in fan_outs if fan_out > 1),
+        'disconnected_nodes': len(successors) - len(connected) if len(successors) > 1 else 0,
+        'cycle_count': sum(
+            1 for component in components
+            if len(component) > 1 or component[0] in successors[component[0]]
+        )
+    }
+    return sorted(edges), metrics
+
+
+def structure_shingles(nodes: List[Dict], edges: List[Tuple[str, str, str, int]]) -> set:
+    """Name-independent shingles of a workflow's structure.
+    
+    One shingle per node type occurrence and per typed connection
+    (source type -> target type), numbered so repeats count, which makes
+    Jaccard similarity over these sets a multiset comparison. Renaming
+    nodes or the workflow doesn't change them; sticky notes are skipped.
+    """
+    node_types = {}
+    if isinstance(nodes, list):
+        for node in nodes:
+            if isinstance(node, dict) and isinstance(node.get('name'), str):
+                node_types[node['name']] = node.get('type') or 'unknown'
+    
+    shingles = set()
+    seen = {}
+    for node_type in node_types.values():
+        if node_type not in GRAPH_IGNORED_NODE_TYPES:
+            key = f"n:{node_type}"
+            seen[key] = seen.get(key, 0) + 1
+            shingles.add(f"{key}#{seen[key]}")
+    for source, target, connection_type, _ in edges:
+        key = f"e:{node_types[source]}>{node_types[target]}:{connection_type}"
+        seen[key] = seen.get(key, 0) + 1
+        shingles.add(f"{key}#{seen[key]}")
+    return shingles
+
+
+def minhash_signature(shingles: set) -> Optional[bytes]:
+    """MINHASH_PERMUTATIONS 32-bit minimums packed little-endian, or None without shingles.
+    
+    One SHAKE-128 read per shingle yields all of its independent 32-bit hash
+    values at once, and the per-position minimums are taken column-wise, so
+    no Python-level loop runs per permutation. Signatures are stable across
+    processes and runs.
+    """
+    if not shingles:
+        return None
+    layout = f'<{MINHASH_PERMUTATIONS}I'
+    hashes = [
+        struct.unpack(layout, hashlib.shake_128(shingle.encode('utf-8')).digest(4 * MINHASH_PERMUTATIONS))
+        for shingle in shingles
+    ]
+    return struct.pack(layout, *map(min, zip(*hashes)))
+
+
+def lsh_buckets(signature: bytes) -> List[Tuple[int, int]]:
+    """(band, bucket) keys of a signature; equal bands hash to the same signed 64-bit bucket."""
+    width = len(signature) // LSH_BANDS
+    return [
+        (band, int.from_bytes(
+            hashlib.blake2b(signature[band * width:(band + 1) * width], digest_size=8).digest(),
+            'little', signed=True
+        ))
+        for band in range(LSH_BANDS)
+    ]
+
+
+def signature_similarity(first: bytes, second: bytes) -> float:
+    """Estimated Jaccard similarity: the share of MinHash positions two signatures agree on."""
+    a = struct.unpack(f'<{MINHASH_PERMUTATIONS}I', first)
+    b = struct.unpack(f'<{MINHASH_PERMUTATIONS}I', second)
+    return sum(x == y for x, y in zip(a, b)) / MINHASH_PERMUTATIONS
+
+
+class TfidfMatrix:
+    """L2-normalized TF-IDF rows in CSR form (``indptr``/``indices``/``data``), one per workflow id.
+    
+    Rows are ordered by ``ids`` (ascending), so a workflow's row is a binary
+    search away. Saved as plain .npy files, which ``load`` memory-maps, so
+    every API worker shares the operating system's page cache instead of a
+    private copy.
+    """
+    
+    ARRAYS = ('ids', 'indptr', 'indices', 'data')
+    
+    def __init__(self, ids, indptr, indices, data):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.term_count = int(indices.max()) + 1 if len(indices) else 0
+        # reduceat gives an empty row the value at its offset rather than 0, so those are masked
+        self._empty_rows = np.diff(indptr) == 0
+    
+    @staticmethod
+    def array_path(prefix: str, name: str) -> str:
+        return f"{prefix}.{name}.npy"
+    
+    @classmethod
+    def load(cls, prefix: str) -> Optional['TfidfMatrix']:
+        """Memory-map a matrix written by ``save``, or None if it (or numpy) is missing."""
+        if np is None:
+            return None
+        try:
+            arrays = [np.load(cls.array_path(prefix, name), mmap_mode='r') for name in cls.ARRAYS]
+        except (OSError, ValueError):
+            return None
+        ids, indptr, indices, data = arrays
+        # A reader racing a rewrite could see arrays from two builds; don't serve those
+        if len(indptr) != len(ids) + 1 or len(indices) != len(data) or int(indptr[-1]) != len(data):
+            return None
+        return cls(*arrays)
+    
+    def save(self, prefix: str):
+        """Write each array to a temporary file and rename it into place."""
+        for name in self.ARRAYS:
+            path = self.array_path(prefix, name)
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, getattr(self, name))
+            os.replace(path + '.tmp', path)
+    
+    def related(self, workflow_id: int, limit: int = 10) -> List[Tuple[int, float]]:
+        """(workflow id, cosine similarity) of the ``limit`` rows closest to ``workflow_id``'s.
+        
+        The scores of all rows come from one sparse matrix-vector product
+        against the workflow's row (a gather and a segmented sum over the
+        stored weights), then argpartition picks the top ``limit``
+        without sorting the whole corpus.
+        """
+        row = int(np.searchsorted(self.ids, workflow_id))
+        if row >= len(self.ids) or self.ids[row] != workflow_id:
+            return []
+        start, end = self.indptr[row], self.indptr[row + 1]
+        if start == end:
+            return []
+        
+        query = np.zeros(self.term_count, dtype=np.float32)
+        query[self.indices[start:end]] = self.data[start:end]
+        # Sum each row's products from its start offset to the next row's; the trailing 0
+        # keeps offsets of empty rows at the end in range without cutting the row before them short
+        products = np.append(self.data * query[self.indices], np.float32(0))
+        scores = np.add.reduceat(products, self.indptr[:-1])
+        scores[self._empty_rows] = 0
+        scores[row] = 0
+        
+        limit = min(limit, int(np.count_nonzero(scores > 0)))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.lexsort((self.ids[top], -scores[top]))]
+        return [(int(self.ids[i]), round(float(scores[i]), 4)) for i in top]
+
+
+class SuggestIndex:
+    """Typeahead over workflow names, integrations, node types and tags, in memory.
+    
+    Every suggestion is keyed by its lowercased text from the start of each
+    word (so "sheets" finds "Google Sheets", and "googlesheets" the
+    n8n-nodes-base.googleSheets node type), and the keys live in one sorted
+    list: a prefix lookup is a bisect to the first key at or after it. The
+    top suggestions of prefixes up to SUGGEST_PRECOMPUTED_PREFIX characters,
+    which match too many keys to scan, are computed once at build time.
+    Suggestions are ranked by how many workflows they cover.
+    """
+    
+    WORD_START = re.compile(r'[a-z0-9]+')
+    
+    def __init__(self, entries: List[Tuple[str, str, int]], generation: int = 0,
+                 last_indexed: str = '', top_size: int = 20):
+        self.generation = generation
+        self.last_indexed = last_indexed
+        # (text, kind, count), best first, so a smaller position means a better suggestion
+        self.entries = sorted(entries, key=lambda entry: (-entry[2], len(entry[0]), entry[0].lower(), entry[1]))
+        
+        keyed = set()
+        for position, (text, _, _) in enumerate(self.entries):
+            lowered = text.lower()
+            for word in self.WORD_START.finditer(lowered):
+                keyed.add((lowered[word.start():], position))
+        keyed = sorted(keyed)
+        self.keys = [key for key, _ in keyed]
+        self.positions = [position for _, position in keyed]
+        
+        self.top = {}
+        for key, position in keyed:
+            for length in range(1, min(SUGGEST_PRECOMPUTED_PREFIX, len(key)) + 1):
+                self.top.setdefault(key[:length], set()).add(position)
+        self.top = {prefix: sorted(positions)[:top_size] for prefix, positions in self.top.items()}
+        self.top_size = top_size
+    
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """The ``limit`` best suggestions having a word that starts with ``prefix``."""
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+        
+        if len(prefix) <= SUGGEST_PRECOMPUTED_PREFIX and limit <= self.top_size:
+            best = self.top.get(prefix, [])[:limit]
+        else:
+            start = bisect.bisect_left(self.keys, prefix)
+            end = bisect.bisect_left(self.keys, prefix + '\uffff', start)
+            best = heapq.nsmallest(limit, set(self.positions[start:end]))
+        
+        return [
+            {'text': text, 'kind': kind, 'count': count}
+            for text, kind, count in (self.entries[position] for position in best)
+        ]
+
+
+def _trigram_query(query: str, match: str) -> str:
+    """FTS5 MATCH expression for the trigram table: the whole text as one phrase
+    (``substring``), or any of its trigrams (``fuzzy``, so near-misses still share most)."""
+    text = ' '.join(query.split())
+    if len(text) < 3:
+        raise ValueError("Substring and fuzzy search need at least 3 characters")
+    if match == 'substring':
+        return '"' + text.replace('"', '""') + '"'
+    trigrams = dict.fromkeys(text.lower()[i:i + 3] for i in range(len(text) - 2))
+    return ' OR '.join('"' + trigram.replace('"', '""') + '"' for trigram in trigrams)
+
+
+def _encode_cursor(ordering: str, sort_value: Any, last_id: int) -> str:
+    """Build an opaque keyset cursor pointing just after a row."""
+    payload = json.dumps([ordering, sort_value, last_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str, ordering: str) -> Tuple[Any, int]:
+    """Decode a cursor from _encode_cursor, checking it was issued for ``ordering``."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_ordering, sort_value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_ordering != ordering or not isinstance(last_id, int):
+        raise ValueError("Cursor does not match this query")
+    # Both values are bound as SQL parameters, so only scalars SQLite can store are accepted
+    for value in (sort_value, last_id):
+        if not (value is None or isinstance(value, (str, int, float))) or (
+                isinstance(value, int) and not -2 ** 63 <= value < 2 ** 63):
+            raise ValueError("Invalid cursor")
+    return sort_value, last_id
+
+
 class WorkflowDatabase:
     """High-performance SQLite database for workflow metadata and search."""
     
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, pool_size: int = None):
         # Use environment variable if no path provided
         if db_path is None:
             db_path = os.environ.get('WORKFLOW_DB_PATH', 'workflows.db')
+        if pool_size is None:
+            pool_size = int(os.environ.get('WORKFLOW_DB_POOL_SIZE', DEFAULT_POOL_SIZE))
+        # Trigram side table for substring/fuzzy search (WORKFLOW_FTS_TRIGRAM=0 drops it);
+        # also turned off when SQLite lacks the trigram tokenizer (before 3.34)
+        self.trigram_enabled = os.environ.get('WORKFLOW_FTS_TRIGRAM', '1') != '0'
         self.db_path = db_path
+        self.tfidf_path = os.path.splitext(db_path)[0] + '.tfidf'
         self.workflows_dir = "workflows"
+        self.pool_size = max(1, pool_size)
+        self._init_pool()
         self.init_database()
     
-    def init_database(self):
-        """Initialize SQLite database with optimized schema and indexes."""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("PRAGMA journal_mode=WAL")  # Write-ahead logging for performance
-        conn.execute("PRAGMA synchronous=NORMAL")
-        conn.execute("PRAGMA cache_size=10000")
+    def __getstate__(self):
+        # Index worker processes only need the configuration, never the connections
+        return {
+            'db_path': self.db_path, 'tfidf_path': self.tfidf_path, 'trigram_enabled': self.trigram_enabled,
+            'workflows_dir': self.workflows_dir, 'pool_size': self.pool_size
+        }
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_pool()
+    
+    def _init_pool(self):
+        """Set up the (lazily filled) read connection pool and the writer slot."""
+        self._read_pool = queue.LifoQueue(maxsize=self.pool_size)
+        self._read_created = 0
+        self._pool_lock = threading.Lock()
+        self._writer = None
+        self._write_lock = threading.RLock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the settings shared by readers and the writer."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA cache_size={CACHE_SIZE_PAGES}")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE_BYTES}")
         conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
+    @contextmanager
+    def _read_connection(self):
+        """Borrow a pooled read-only connection; blocks while all pool_size are in use."""
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                create = self._read_created < self.pool_size
+                if create:
+                    self._read_created += 1
+            if create:
+                try:
+                    conn = self._connect()
+                    conn.execute("PRAGMA query_only=1")
+                except Exception:
+                    with self._pool_lock:
+                        self._read_created -= 1
+                    raise
+            else:
+                conn = self._read_pool.get()
         
-        # Create main workflows table
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS workflows (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                filename TEXT UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                workflow_id TEXT,
-                active BOOLEAN DEFAULT 0,
-                description TEXT,
-                trigger_type TEXT,
-                complexity TEXT,
-                node_count INTEGER DEFAULT 0,
-                integrations TEXT,  -- JSON array
-                tags TEXT,         -- JSON array
-                created_at TEXT,
-                updated_at TEXT,
-                file_hash TEXT,
-                file_size INTEGER,
-                analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create FTS5 table for full-text search
-        conn.execute("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS workflows_fts USING fts5(
-                filename,
-                name,
-                description,
-                integrations,
-                tags,
-                content=workflows,
-                content_rowid=id
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+    
+    @contextmanager
+    def _write_connection(self):
+        """Use the dedicated writer connection; writes are serialized on it."""
+        with self._write_lock:
+            if self._writer is None:
+                conn = self._connect()
+                conn.execute("PRAGMA journal_mode=WAL")  # Write-ahead logging for performance
+                conn.execute("PRAGMA synchronous=NORMAL")
+                self._writer = conn
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.rollback()
+                raise
+    
+    def close(self):
+        """Close the writer and every idle pooled read connection."""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._read_pool.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._pool_lock:
+                self._read_created -= 1
+    
+    def init_database(self):
+        """Initialize SQLite database with optimized schema and indexes."""
+        with self._write_connection() as conn:
+            # Create main workflows table
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS workflows (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    filename TEXT UNIQUE NOT NULL,
+                    name TEXT NOT NULL,
+                    workflow_id TEXT,
+                    active BOOLEAN DEFAULT 0,
+                    description TEXT,
+                    trigger_type TEXT,
+                    complexity TEXT,
+                    node_count INTEGER DEFAULT 0,
+                    integrations TEXT,  -- JSON array
+                    tags TEXT,         -- JSON array
+                    created_at TEXT,
+                    updated_at TEXT,
+                    file_hash TEXT,
+                    file_size INTEGER,
+                    file_mtime_ns INTEGER,
+                    file_inode INTEGER,
+                    graph_depth INTEGER NOT NULL DEFAULT 0,
+                    max_fan_out INTEGER NOT NULL DEFAULT 0,
+                    branch_count INTEGER NOT NULL DEFAULT 0,
+                    disconnected_nodes INTEGER NOT NULL DEFAULT 0,
+                    cycle_count INTEGER NOT NULL DEFAULT 0,
+                    analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Normalized integrations so category/integration filters are index lookups
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_integrations (
+                    workflow_id INTEGER NOT NULL,
+                    integration TEXT NOT NULL,
+                    category TEXT,
+                    PRIMARY KEY (workflow_id, integration)
+                ) WITHOUT ROWID
+            """)
+            
+            # Node types used by each workflow, with how many nodes of that type it has
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_nodes (
+                    workflow_id INTEGER NOT NULL,
+                    node_type TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (workflow_id, node_type)
+                ) WITHOUT ROWID
+            """)
+            
+            # Connection graph edges between named nodes
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_edges (
+                    workflow_id INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    connection_type TEXT NOT NULL,
+                    output_index INTEGER NOT NULL,
+                    PRIMARY KEY (workflow_id, source, target, connection_type, output_index)
+                ) WITHOUT ROWID
+            """)
+            
+            # MinHash signatures over structure_shingles, and their LSH band buckets
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_minhash (
+                    workflow_id INTEGER PRIMARY KEY,
+                    signature BLOB NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_lsh (
+                    band INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    workflow_id INTEGER NOT NULL,
+                    PRIMARY KEY (band, bucket, workflow_id)
+                ) WITHOUT ROWID
+            """)
+            
+            # Single-row statistics materialization, refreshed by the indexer
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    total INTEGER NOT NULL DEFAULT 0,
+                    active INTEGER NOT NULL DEFAULT 0,
+                    total_nodes INTEGER NOT NULL DEFAULT 0,
+                    triggers TEXT,      -- JSON object
+                    complexity TEXT,    -- JSON object
+                    unique_integrations INTEGER NOT NULL DEFAULT 0,
+                    last_indexed TEXT,
+                    generation INTEGER NOT NULL DEFAULT 0  -- bumped by every index run
+                )
+            """)
+            
+            # Mermaid diagrams keyed by content hash, built by the indexer (or on first request)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_diagrams (
+                    file_hash TEXT PRIMARY KEY,
+                    diagram TEXT NOT NULL
+                ) WITHOUT ROWID
+            """)
+            
+            # Workflow file bytes, gzip-compressed (plus brotli when available), keyed by
+            # content hash; lets the API serve detail/download from the database alone
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_content (
+                    file_hash TEXT PRIMARY KEY,
+                    content BLOB NOT NULL,
+                    content_br BLOB
+                )
+            """)
+            
+            # Stat signature of files that failed to parse, so incremental runs
+            # skip them until the file changes
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_errors (
+                    filename TEXT PRIMARY KEY,
+                    file_size INTEGER,
+                    file_mtime_ns INTEGER,
+                    file_inode INTEGER
+                ) WITHOUT ROWID
+            """)
+            
+            self._migrate_schema(conn)
+            
+            # Create FTS5 tables for full-text search
+            self._create_fts_tables(conn)
+            
+            # Create indexes for fast filtering
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_trigger_type ON workflows(trigger_type)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_complexity ON workflows(complexity)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_active ON workflows(active)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_node_count ON workflows(node_count)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_filename ON workflows(filename)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyzed_at ON workflows(analyzed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_wi_integration ON workflow_integrations(integration, workflow_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_wi_category ON workflow_integrations(category, workflow_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_wn_node_type ON workflow_nodes(node_type, workflow_id)")
+            for column in GRAPH_METRIC_COLUMNS:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{column} ON workflows({column})")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_lsh_workflow ON workflow_lsh(workflow_id)")
+            
+            # Create triggers to keep FTS table in sync
+            self._create_fts_triggers(conn)
+            
+            conn.commit()
+    
+    def _migrate_schema(self, conn: sqlite3.Connection):
+        """Upgrade databases created by older versions in place."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(workflows)")}
+        
+        # v1: stat signature used for change detection without reading files
+        for column in ('file_mtime_ns', 'file_inode'):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE workflows ADD COLUMN {column} INTEGER")
+        
+        # v2: workflows_au only resyncs FTS when an indexed text column changed
+        if version < 2:
+            conn.execute("DROP TRIGGER IF EXISTS workflows_au")
+        
+        # v3: backfill workflow_integrations from the integrations JSON column
+        if version < 3:
+            cursor = conn.execute("SELECT id, integrations FROM workflows")
+            conn.executemany(
+                "INSERT OR IGNORE INTO workflow_integrations (workflow_id, integration, category) VALUES (?, ?, ?)",
+                [
+                    (workflow_id, integration, get_integration_category(integration))
+                    for workflow_id, integrations in cursor.fetchall()
+                    for integration in json.loads(integrations or '[]')
+                ]
             )
-        """)
-        
-        # Create indexes for fast filtering
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_trigger_type ON workflows(trigger_type)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_complexity ON workflows(complexity)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_active ON workflows(active)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_node_count ON workflows(node_count)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_filename ON workflows(filename)")
         
-        # Create triggers to keep FTS table in sync
-        conn.execute("""
-            CREATE TRIGGER IF NOT EXISTS workflows_ai AFTER INSERT ON workflows BEGIN
-                INSERT INTO workflows_fts(rowid, filename, name, description, integrations, tags)
-                VALUES (new.id, new.filename, new.name, new.description, new.integrations, new.tags);
-            END
-        """)
+        # v4: materialize statistics; the last analysis time stands in for the last index run
+        if version < 4:
+            last_analyzed = conn.execute("SELECT MAX(analyzed_at) FROM workflows").fetchone()[0]
+            last_indexed = ''
+            if last_analyzed:
+                last_indexed = datetime.datetime.fromisoformat(last_analyzed).replace(
+                    tzinfo=datetime.timezone.utc
+                ).isoformat()
+            self._refresh_stats(conn, last_indexed)
+        
+        # v5: index generation counter for invalidating cached query results
+        stats_columns = {row[1] for row in conn.execute("PRAGMA table_info(workflow_stats)")}
+        if 'generation' not in stats_columns:
+            conn.execute("ALTER TABLE workflow_stats ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+        
+        # v6: workflow_diagrams (created above); existing rows get theirs lazily on first request
+        
+        # v7: workflow_content (created above); index_all_workflows reanalyzes rows without content
+        
+        # v8: brotli variant of the stored content, filled in by the indexer when brotli is installed
+        content_columns = {row[1] for row in conn.execute("PRAGMA table_info(workflow_content)")}
+        if 'content_br' not in content_columns:
+            conn.execute("ALTER TABLE workflow_content ADD COLUMN content_br BLOB")
+        
+        # v10: graph metric columns
+        for column in GRAPH_METRIC_COLUMNS:
+            if column not in columns:
+                conn.execute(f"ALTER TABLE workflows ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        
+        # v9-v11: workflow_nodes (v9), graph metrics and workflow_edges (v10), and MinHash
+        # signatures with their LSH buckets (v11), backfilled in one pass over the stored
+        # content (rows without it are reanalyzed by the next index run anyway)
+        if version < 11:
+            cursor = conn.execute("""
+                SELECT w.id, c.content FROM workflows w
+                JOIN workflow_content c ON c.file_hash = w.file_hash
+            """)
+            for workflow_id, content_gz in cursor.fetchall():
+                data = json.loads(gzip.decompress(content_gz).decode('utf-8'))
+                nodes = data.get('nodes', [])
+                if version < 9:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO workflow_nodes (workflow_id, node_type, count) VALUES (?, ?, ?)",
+                        [(workflow_id, node_type, count) for node_type, count in count_node_types(nodes).items()]
+                    )
+                
+                edges, metrics = analyze_graph(nodes, data.get('connections', {}))
+                if version < 10:
+                    conn.execute(
+                        f"UPDATE workflows SET {', '.join(f'{column} = ?' for column in metrics)} WHERE id = ?",
+                        (*metrics.values(), workflow_id)
+                    )
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO workflow_edges VALUES (?, ?, ?, ?, ?)",
+                        [(workflow_id, *edge) for edge in edges]
+                    )
+                
+                signature = minhash_signature(structure_shingles(nodes, edges))
+                if signature is None:
+                    continue
+                conn.execute(
+                    "INSERT OR REPLACE INTO workflow_minhash (workflow_id, signature) VALUES (?, ?)",
+                    (workflow_id, signature)
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO workflow_lsh (band, bucket, workflow_id) VALUES (?, ?, ?)",
+                    [(band, bucket, workflow_id) for band, bucket in lsh_buckets(signature)]
+                )
+        
+        # v12: workflows_fts gains prefix indexes and a weighted bm25 rank; it is dropped
+        # here and _create_fts_tables recreates and refills it right after the migration
+        if version < 12:
+            for trigger in ('workflows_ai', 'workflows_ad', 'workflows_au'):
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            conn.execute("DROP TABLE IF EXISTS workflows_fts")
+        
+        # v13: workflow_errors (created above); failed files are recorded from the next index run
+        
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    def _fts_tables(self) -> Dict[str, str]:
+        """FTS5 tables indexing the workflows text, mapped to their sync trigger name prefix."""
+        tables = {'workflows_fts': 'workflows'}
+        if self.trigram_enabled:
+            tables['workflows_trigram'] = 'workflows_trigram'
+        return tables
+    
+    def _create_fts_tables(self, conn: sqlite3.Connection):
+        """Create (and fill) missing FTS5 tables, with bm25 weights as their default rank.
         
-        conn.execute("""
-            CREATE TRIGGER IF NOT EXISTS workflows_ad AFTER DELETE ON workflows BEGIN
-                INSERT INTO workflows_fts(workflows_fts, rowid, filename, name, description, integrations, tags)
-                VALUES ('delete', old.id, old.filename, old.name, old.description, old.integrations, old.tags);
-            END
-        """)
+        workflows_fts tokenizes words and keeps prefix indexes; the optional
+        workflows_trigram side table indexes every three-character sequence
+        so arbitrary substrings can be matched.
+        """
+        existing = {
+            row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE name IN ('workflows_fts', 'workflows_trigram')"
+            )
+        }
+        if not self.trigram_enabled and 'workflows_trigram' in existing:
+            for trigger in ('workflows_trigram_ai', 'workflows_trigram_ad', 'workflows_trigram_au'):
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            conn.execute("DROP TABLE workflows_trigram")
+        
+        columns = ", ".join(column for column, _ in FTS_COLUMN_WEIGHTS)
+        rank = f"bm25({', '.join(str(weight) for _, weight in FTS_COLUMN_WEIGHTS)})"
+        options = {'workflows_fts': f"prefix='{FTS_PREFIX_LENGTHS}'", 'workflows_trigram': "tokenize='trigram'"}
+        for table in self._fts_tables():
+            if table in existing:
+                continue
+            try:
+                conn.execute(f"""
+                    CREATE VIRTUAL TABLE {table} USING fts5(
+                        {columns},
+                        content=workflows,
+                        content_rowid=id,
+                        {options[table]}
+                    )
+                """)
+            except sqlite3.OperationalError:
+                if table == 'workflows_fts':
+                    raise
+                # No trigram tokenizer in this SQLite build
+                self.trigram_enabled = False
+                continue
+            conn.execute(f"INSERT INTO {table}({table}, rank) VALUES('rank', ?)", (rank,))
+            conn.execute(f"INSERT INTO {table}({table}) VALUES('rebuild')")
+    
+    def _create_fts_triggers(self, conn: sqlite3.Connection):
+        """Create the triggers that keep the FTS tables in sync with row changes."""
+        columns = ", ".join(column for column, _ in FTS_COLUMN_WEIGHTS)
+        old_values = ", ".join(f"old.{column}" for column, _ in FTS_COLUMN_WEIGHTS)
+        new_values = ", ".join(f"new.{column}" for column, _ in FTS_COLUMN_WEIGHTS)
+        changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column, _ in FTS_COLUMN_WEIGHTS)
+        
+        for table, prefix in self._fts_tables().items():
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {prefix}_ai AFTER INSERT ON workflows BEGIN
+                    INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new_values});
+                END
+            """)
+            
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {prefix}_ad AFTER DELETE ON workflows BEGIN
+                    INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                END
+            """)
+            
+            # Upserts and stat refreshes update rows without touching indexed text; skip those
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {prefix}_au AFTER UPDATE ON workflows
+                WHEN {changed}
+                BEGIN
+                    INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                    INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new_values});
+                END
+            """)
+    
+    def _drop_fts_triggers(self, conn: sqlite3.Connection):
+        """Drop the FTS sync triggers (bulk loads rebuild the FTS tables once instead)."""
+        for prefix in self._fts_tables().values():
+            for suffix in ('ai', 'ad', 'au'):
+                conn.execute(f"DROP TRIGGER IF EXISTS {prefix}_{suffix}")
+    
+    def _refresh_stats(self, conn: sqlite3.Connection, last_indexed: str):
+        """Recompute the workflow_stats row from the indexed tables (keeps the generation)."""
+        total, active, total_nodes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(active = 1), 0), COALESCE(SUM(node_count), 0) FROM workflows"
+        ).fetchone()
+        triggers = dict(conn.execute(
+            "SELECT trigger_type, COUNT(*) FROM workflows GROUP BY trigger_type"
+        ).fetchall())
+        complexity = dict(conn.execute(
+            "SELECT complexity, COUNT(*) FROM workflows GROUP BY complexity"
+        ).fetchall())
+        unique_integrations = conn.execute(
+            "SELECT COUNT(DISTINCT integration) FROM workflow_integrations"
+        ).fetchone()[0]
         
         conn.execute("""
-            CREATE TRIGGER IF NOT EXISTS workflows_au AFTER UPDATE ON workflows BEGIN
-                INSERT INTO workflows_fts(workflows_fts, rowid, filename, name, description, integrations, tags)
-                VALUES ('delete', old.id, old.filename, old.name, old.description, old.integrations, old.tags);
-                INSERT INTO workflows_fts(rowid, filename, name, description, integrations, tags)
-                VALUES (new.id, new.filename, new.name, new.description, new.integrations, new.tags);
-            END
-        """)
-        
-        conn.commit()
-        conn.close()
+            INSERT INTO workflow_stats (
+                id, total, active, total_nodes, triggers, complexity, unique_integrations, last_indexed
+            ) VALUES (1, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                total = excluded.total,
+                active = excluded.active,
+                total_nodes = excluded.total_nodes,
+                triggers = excluded.triggers,
+                complexity = excluded.complexity,
+                unique_integrations = excluded.unique_integrations,
+                last_indexed = excluded.last_indexed
+        """, (
+            total, active, total_nodes, json.dumps(triggers), json.dumps(complexity),
+            unique_integrations, last_indexed
+        ))
     
     def get_file_hash(self, file_path: str) -> str:
         """Get MD5 hash of file for change detection."""
@@ -147,18 +1257,27 @@ class WorkflowDatabase:
         
         return ' '.join(readable_parts)
     
-    def analyze_workflow_file(self, file_path: str) -> Optional[Dict[str, Any]]:
-        """Analyze a single workflow file and extract metadata."""
+    def analyze_workflow_file(self, file_path: str, content: Optional[bytes] = None,
+                              file_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Analyze a single workflow file and extract metadata.
+        
+        The file is read once and the same buffer is hashed and parsed; pass
+        ``content`` (and optionally its ``file_hash``) to reuse bytes already read.
+        """
+        if content is None:
+            with open(file_path, 'rb') as f:
+                content = f.read()
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = json.loads(content.decode('utf-8'))
         except (json.JSONDecodeError, UnicodeDecodeError) as e:
             print(f"Error reading {file_path}: {str(e)}")
             return None
         
         filename = os.path.basename(file_path)
-        file_size = os.path.getsize(file_path)
-        file_hash = self.get_file_hash(file_path)
+        file_size = len(content)
+        if file_hash is None:
+            file_hash = hashlib.md5(content).hexdigest()
         
         # Extract basic metadata
         workflow = {
@@ -197,10 +1316,18 @@ class WorkflowDatabase:
         # Find trigger type and integrations
         trigger_type, integrations = self.analyze_nodes(workflow['nodes'])
         workflow['trigger_type'] = trigger_type
-        workflow['integrations'] = list(integrations)
+        # Sorted so reindexing unchanged content yields identical text (no FTS rewrite)
+        workflow['integrations'] = sorted(integrations)
         
         # Generate description
-        workflow['description'] = self.generate_description(workflow, trigger_type, integrations)
+        workflow['description'] = self.generate_description(workflow, trigger_type, workflow['integrations'])
+        
+        # Connection graph edges and structural metrics
+        workflow['edges'], graph_metrics = analyze_graph(workflow['nodes'], workflow['connections'])
+        workflow.update(graph_metrics)
+        
+        # Structural fingerprint for near-duplicate lookups
+        workflow['minhash'] = minhash_signature(structure_shingles(workflow['nodes'], workflow['edges']))
         
         return workflow
     
@@ -209,169 +1336,22 @@ class WorkflowDatabase:
         trigger_type = 'Manual'
         integrations = set()
         
-        # Enhanced service mapping for better recognition
-        service_mappings = {
-            # Messaging & Communication
-            'telegram': 'Telegram',
-            'telegramTrigger': 'Telegram',
-            'discord': 'Discord',
-            'slack': 'Slack', 
-            'whatsapp': 'WhatsApp',
-            'mattermost': 'Mattermost',
-            'teams': 'Microsoft Teams',
-            'rocketchat': 'Rocket.Chat',
-            
-            # Email
-            'gmail': 'Gmail',
-            'mailjet': 'Mailjet',
-            'emailreadimap': 'Email (IMAP)',
-            'emailsendsmt': 'Email (SMTP)',
-            'outlook': 'Outlook',
-            
-            # Cloud Storage
-            'googledrive': 'Google Drive',
-            'googledocs': 'Google Docs',
-            'googlesheets': 'Google Sheets',
-            'dropbox': 'Dropbox',
-            'onedrive': 'OneDrive',
-            'box': 'Box',
-            
-            # Databases
-            'postgres': 'PostgreSQL',
-            'mysql': 'MySQL',
-            'mongodb': 'MongoDB',
-            'redis': 'Redis',
-            'airtable': 'Airtable',
-            'notion': 'Notion',
-            
-            # Project Management
-            'jira': 'Jira',
-            'github': 'GitHub',
-            'gitlab': 'GitLab',
-            'trello': 'Trello',
-            'asana': 'Asana',
-            'mondaycom': 'Monday.com',
-            
-            # AI/ML Services
-            'openai': 'OpenAI',
-            'anthropic': 'Anthropic',
-            'huggingface': 'Hugging Face',
-            
-            # Social Media
-            'linkedin': 'LinkedIn',
-            'twitter': 'Twitter/X',
-            'facebook': 'Facebook',
-            'instagram': 'Instagram',
-            
-            # E-commerce
-            'shopify': 'Shopify',
-            'stripe': 'Stripe',
-            'paypal': 'PayPal',
-            
-            # Analytics
-            'googleanalytics': 'Google Analytics',
-            'mixpanel': 'Mixpanel',
-            
-            # Calendar & Tasks
-            'googlecalendar': 'Google Calendar', 
-            'googletasks': 'Google Tasks',
-            'cal': 'Cal.com',
-            'calendly': 'Calendly',
-            
-            # Forms & Surveys
-            'typeform': 'Typeform',
-            'googleforms': 'Google Forms',
-            'form': 'Form Trigger',
-            
-            # Development Tools
-            'webhook': 'Webhook',
-            'httpRequest': 'HTTP Request',
-            'graphql': 'GraphQL',
-            'sse': 'Server-Sent Events',
-            
-            # Utility nodes (exclude from integrations)
-            'set': None,
-            'function': None,
-            'code': None,
-            'if': None,
-            'switch': None,
-            'merge': None,
-            'split': None,
-            'stickynote': None,
-            'stickyNote': None,
-            'wait': None,
-            'schedule': None,
-            'cron': None,
-            'manual': None,
-            'stopanderror': None,
-            'noop': None,
-            'noOp': None,
-            'error': None,
-            'limit': None,
-            'aggregate': None,
-            'summarize': None,
-            'filter': None,
-            'sort': None,
-            'removeDuplicates': None,
-            'dateTime': None,
-            'extractFromFile': None,
-            'convertToFile': None,
-            'readBinaryFile': None,
-            'readBinaryFiles': None,
-            'executionData': None,
-            'executeWorkflow': None,
-            'executeCommand': None,
-            'respondToWebhook': None,
-        }
-        
         for node in nodes:
-            node_type = node.get('type', '')
+            trigger_hint, service_name = _classify_node_type(node.get('type', ''))
             node_name = node.get('name', '').lower()
             
             # Determine trigger type
-            if 'webhook' in node_type.lower() or 'webhook' in node_name:
+            if trigger_hint == 'webhook' or 'webhook' in node_name:
                 trigger_type = 'Webhook'
-            elif 'cron' in node_type.lower() or 'schedule' in node_type.lower():
+            elif trigger_hint == 'scheduled':
                 trigger_type = 'Scheduled'
-            elif 'trigger' in node_type.lower() and trigger_type == 'Manual':
-                if 'manual' not in node_type.lower():
-                    trigger_type = 'Webhook'
-            
-            # Extract integrations with enhanced mapping
-            service_name = None
-            
-            # Handle n8n-nodes-base nodes
-            if node_type.startswith('n8n-nodes-base.'):
-                raw_service = node_type.replace('n8n-nodes-base.', '').lower()
-                raw_service = raw_service.replace('trigger', '')
-                service_name = service_mappings.get(raw_service, raw_service.title() if raw_service else None)
-            
-            # Handle @n8n/ namespaced nodes
-            elif node_type.startswith('@n8n/'):
-                raw_service = node_type.split('.')[-1].lower() if '.' in node_type else node_type.lower()
-                raw_service = raw_service.replace('trigger', '')
-                service_name = service_mappings.get(raw_service, raw_service.title() if raw_service else None)
-            
-            # Handle custom nodes
-            elif '-' in node_type:
-                # Try to extract service name from custom node names like "n8n-nodes-youtube-transcription-kasha.youtubeTranscripter"
-                parts = node_type.lower().split('.')
-                for part in parts:
-                    if 'youtube' in part:
-                        service_name = 'YouTube'
-                        break
-                    elif 'telegram' in part:
-                        service_name = 'Telegram'
-                        break
-                    elif 'discord' in part:
-                        service_name = 'Discord'
-                        break
+            elif trigger_hint == 'trigger' and trigger_type == 'Manual':
+                trigger_type = 'Webhook'
             
             # Also check node names for service hints
-            for service_key, service_value in service_mappings.items():
-                if service_key in node_name and service_value:
-                    service_name = service_value
-                    break
+            name_hint = _match_service_in_name(node_name)
+            if name_hint:
+                service_name = name_hint
             
             # Add to integrations if valid service found
             if service_name and service_name not in ['None', None]:
@@ -383,7 +1363,7 @@ class WorkflowDatabase:
         
         return trigger_type, integrations
     
-    def generate_description(self, workflow: Dict, trigger_type: str, integrations: set) -> str:
+    def generate_description(self, workflow: Dict, trigger_type: str, integrations: List[str]) -> str:
         """Generate a descriptive summary of the workflow."""
         name = workflow['name']
         node_count = workflow['node_count']
@@ -429,286 +1409,1202 @@ class WorkflowDatabase:
         
         return desc + "."
     
-    def index_all_workflows(self, force_reindex: bool = False) -> Dict[str, int]:
-        """Index all workflow files. Only reprocesses changed files unless force_reindex=True."""
+    def _analyze_for_index(self, task: Tuple[str, Optional[str], Tuple[int, int, int]]) -> Optional[Dict[str, Any]]:
+        """Analyze a file for the indexer; safe to run inside a worker process.
+        
+        ``task`` is (file_path, stored_hash, (size, mtime_ns, inode)). When the
+        content hash still matches the stored one the file is not parsed and
+        only the new stat signature is returned (marked ``unchanged``).
+        """
+        file_path, stored_hash, (_, file_mtime_ns, file_inode) = task
+        try:
+            with open(file_path, 'rb') as f:
+                content = f.read()
+            file_hash = hashlib.md5(content).hexdigest()
+            
+            if file_hash == stored_hash:
+                workflow_data = {
+                    'filename': os.path.basename(file_path),
+                    'unchanged': True,
+                    'file_size': len(content)
+                }
+            else:
+                workflow_data = self.analyze_workflow_file(file_path, content=content, file_hash=file_hash)
+        except Exception as e:
+            print(f"Error processing {file_path}: {str(e)}")
+            return None
+        
+        if workflow_data:
+            if not workflow_data.get('unchanged'):
+                workflow_data['node_types'] = count_node_types(workflow_data['nodes'])
+                # mtime=0 keeps the compressed bytes a pure function of the content
+                workflow_data['content_gz'] = gzip.compress(content, compresslevel=CONTENT_COMPRESS_LEVEL, mtime=0)
+                if brotli is not None:
+                    workflow_data['content_br'] = brotli.compress(content, quality=CONTENT_BROTLI_QUALITY)
+                try:
+                    workflow_data['diagram'] = generate_mermaid_diagram(
+                        workflow_data['nodes'], workflow_data['connections']
+                    )
+                except Exception as e:
+                    # Left to the diagram route, which reports the error when it's requested
+                    print(f"Error generating diagram for {file_path}: {str(e)}")
+            
+            # Raw nodes/connections are not stored, so don't ship them back to the writer
+            workflow_data.pop('nodes', None)
+            workflow_data.pop('connections', None)
+            workflow_data['file_mtime_ns'] = file_mtime_ns
+            workflow_data['file_inode'] = file_inode
+        return workflow_data
+    
+    def _resolve_workers(self, workers: Optional[int]) -> int:
+        """Resolve the analysis worker count (argument, WORKFLOW_INDEX_WORKERS, CPU count)."""
+        if workers is None:
+            env_workers = os.environ.get('WORKFLOW_INDEX_WORKERS')
+            workers = int(env_workers) if env_workers else (os.cpu_count() or 1)
+        return max(1, workers)
+    
+    def _analyze_files(self, tasks: List[Tuple], workers: int):
+        """Yield (file_path, workflow_data) pairs, using a process pool for large batches."""
+        if workers <= 1 or len(tasks) < PARALLEL_INDEX_MIN_FILES:
+            for task in tasks:
+                yield task[0], self._analyze_for_index(task)
+            return
+        
+        chunksize = max(1, len(tasks) // (workers * 8))
+        # Never fork: the API server reindexes from a thread of a process with other
+        # live threads and open SQLite connections; workers get a pickled copy of self
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method)) as executor:
+            results = executor.map(self._analyze_for_index, tasks, chunksize=chunksize)
+            for task, workflow_data in zip(tasks, results):
+                yield task[0], workflow_data
+    
+    def _workflow_row(self, workflow_data: Dict[str, Any]) -> Tuple:
+        """Build the parameter tuple for storing one analyzed workflow."""
+        return (
+            workflow_data['filename'],
+            workflow_data['name'],
+            workflow_data['workflow_id'],
+            workflow_data['active'],
+            workflow_data['description'],
+            workflow_data['trigger_type'],
+            workflow_data['complexity'],
+            workflow_data['node_count'],
+            json.dumps(workflow_data['integrations']),
+            json.dumps(workflow_data['tags']),
+            workflow_data['created_at'],
+            workflow_data['updated_at'],
+            workflow_data['file_hash'],
+            workflow_data['file_size'],
+            workflow_data['file_mtime_ns'],
+            workflow_data['file_inode'],
+            *(workflow_data[column] for column in GRAPH_METRIC_COLUMNS)
+        )
+    
+    def _store_workflows(self, conn: sqlite3.Connection, batch: List[Dict[str, Any]], stats: Dict[str, Any]):
+        """Insert or update a batch of analyzed workflows with a single executemany.
+        
+        Existing rows are updated in place, so their ``id`` stays stable across
+        reindexes; the normalized integration rows are rewritten alongside.
+        """
+        sql = """
+            INSERT INTO workflows (
+                filename, name, workflow_id, active, description, trigger_type,
+                complexity, node_count, integrations, tags, created_at, updated_at,
+                file_hash, file_size, file_mtime_ns, file_inode,
+                graph_depth, max_fan_out, branch_count, disconnected_nodes, cycle_count, analyzed_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(filename) DO UPDATE SET
+                name = excluded.name,
+                workflow_id = excluded.workflow_id,
+                active = excluded.active,
+                description = excluded.description,
+                trigger_type = excluded.trigger_type,
+                complexity = excluded.complexity,
+                node_count = excluded.node_count,
+                integrations = excluded.integrations,
+                tags = excluded.tags,
+                created_at = excluded.created_at,
+                updated_at = excluded.updated_at,
+                file_hash = excluded.file_hash,
+                file_size = excluded.file_size,
+                file_mtime_ns = excluded.file_mtime_ns,
+                file_inode = excluded.file_inode,
+                graph_depth = excluded.graph_depth,
+                max_fan_out = excluded.max_fan_out,
+                branch_count = excluded.branch_count,
+                disconnected_nodes = excluded.disconnected_nodes,
+                cycle_count = excluded.cycle_count,
+                analyzed_at = excluded.analyzed_at
+        """
+        try:
+            conn.executemany(sql, [self._workflow_row(workflow_data) for workflow_data in batch])
+            stored = batch
+        except sqlite3.Error:
+            # Retry row by row so one bad row doesn't cost the whole batch
+            stored = []
+            for workflow_data in batch:
+                try:
+                    conn.execute(sql, self._workflow_row(workflow_data))
+                    stored.append(workflow_data)
+                except sqlite3.Error as e:
+                    print(f"Error processing {workflow_data['filename']}: {str(e)}")
+                    stats['errors'] += 1
+        
+        self._store_integrations(conn, stored)
+        self._store_node_types(conn, stored)
+        self._store_edges(conn, stored)
+        self._store_minhash(conn, stored)
+        conn.executemany(
+            "INSERT OR IGNORE INTO workflow_diagrams (file_hash, diagram) VALUES (?, ?)",
+            [(w['file_hash'], w['diagram']) for w in stored if w.get('diagram') is not None]
+        )
+        conn.executemany(
+            """
+                INSERT INTO workflow_content (file_hash, content, content_br) VALUES (?, ?, ?)
+                ON CONFLICT(file_hash) DO UPDATE SET content_br = COALESCE(content_br, excluded.content_br)
+            """,
+            [
+                (w['file_hash'], w['content_gz'], w.get('content_br'))
+                for w in stored if w.get('content_gz') is not None
+            ]
+        )
+        stats['processed'] += len(stored)
+    
+    def _store_integrations(self, conn: sqlite3.Connection, batch: List[Dict[str, Any]]):
+        """Replace the workflow_integrations rows of the given workflows."""
+        conn.executemany(
+            "DELETE FROM workflow_integrations WHERE workflow_id = (SELECT id FROM workflows WHERE filename = ?)",
+            [(workflow_data['filename'],) for workflow_data in batch]
+        )
+        conn.executemany("""
+            INSERT INTO workflow_integrations (workflow_id, integration, category)
+            SELECT id, ?, ? FROM workflows WHERE filename = ?
+        """, [
+            (integration, get_integration_category(integration), workflow_data['filename'])
+            for workflow_data in batch
+            for integration in workflow_data['integrations']
+        ])
+    
+    def _store_edges(self, conn: sqlite3.Connection, batch: List[Dict[str, Any]]):
+        """Replace the workflow_edges rows of the given workflows."""
+        conn.executemany(
+            "DELETE FROM workflow_edges WHERE workflow_id = (SELECT id FROM workflows WHERE filename = ?)",
+            [(workflow_data['filename'],) for workflow_data in batch]
+        )
+        conn.executemany("""
+            INSERT OR IGNORE INTO workflow_edges (workflow_id, source, target, connection_type, output_index)
+            SELECT id, ?, ?, ?, ? FROM workflows WHERE filename = ?
+        """, [
+            (*edge, workflow_data['filename'])
+            for workflow_data in batch
+            for edge in workflow_data.get('edges', [])
+        ])
+    
+    def _store_minhash(self, conn: sqlite3.Connection, batch: List[Dict[str, Any]]):
+        """Replace the MinHash signatures and LSH buckets of the given workflows."""
+        filenames = [(workflow_data['filename'],) for workflow_data in batch]
+        conn.executemany(
+            "DELETE FROM workflow_minhash WHERE workflow_id = (SELECT id FROM workflows WHERE filename = ?)",
+            filenames
+        )
+        conn.executemany(
+            "DELETE FROM workflow_lsh WHERE workflow_id = (SELECT id FROM workflows WHERE filename = ?)",
+            filenames
+        )
+        signed = [w for w in batch if w.get('minhash') is not None]
+        conn.executemany("""
+            INSERT INTO workflow_minhash (workflow_id, signature)
+            SELECT id, ? FROM workflows WHERE filename = ?
+        """, [(w['minhash'], w['filename']) for w in signed])
+        conn.executemany("""
+            INSERT OR IGNORE INTO workflow_lsh (band, bucket, workflow_id)
+            SELECT ?, ?, id FROM workflows WHERE filename = ?
+        """, [
+            (band, bucket, w['filename'])
+            for w in signed
+            for band, bucket in lsh_buckets(w['minhash'])
+        ])
+    
+    def _store_node_types(self, conn: sqlite3.Connection, batch: List[Dict[str, Any]]):
+        """Replace the workflow_nodes rows of the given workflows."""
+        conn.executemany(
+            "DELETE FROM workflow_nodes WHERE workflow_id = (SELECT id FROM workflows WHERE filename = ?)",
+            [(workflow_data['filename'],) for workflow_data in batch]
+        )
+        conn.executemany("""
+            INSERT INTO workflow_nodes (workflow_id, node_type, count)
+            SELECT id, ?, ? FROM workflows WHERE filename = ?
+        """, [
+            (node_type, count, workflow_data['filename'])
+            for workflow_data in batch
+            for node_type, count in workflow_data.get('node_types', {}).items()
+        ])
+    
+    def _store_file_stats(self, conn: sqlite3.Connection, workflows: List[Dict[str, Any]]):
+        """Refresh the stat signature of files whose content did not change."""
+        conn.executemany("""
+            UPDATE workflows SET file_size = ?, file_mtime_ns = ?, file_inode = ?
+            WHERE filename = ?
+        """, [
+            (wd['file_size'], wd['file_mtime_ns'], wd['file_inode'], wd['filename'])
+            for wd in workflows
+        ])
+    
+    def _scan_workflow_files(self) -> List[Tuple[str, Tuple[int, int, int]]]:
+        """List workflow JSON files with their (size, mtime_ns, inode) signature, without reading them."""
+        entries = []
+        with os.scandir(self.workflows_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.json') or not entry.is_file():
+                    continue
+                st = entry.stat()
+                entries.append((entry.path, (st.st_size, st.st_mtime_ns, entry.inode())))
+        return entries
+    
+    def index_all_workflows(self, force_reindex: bool = False, workers: Optional[int] = None) -> Dict[str, Any]:
+        """Index all workflow files. Only reprocesses changed files unless force_reindex=True.
+        
+        Change detection compares each file's (size, mtime_ns, inode) with the
+        values stored at the last index, so unchanged files are never opened;
+        only files whose stat differs are read and hashed. Files that failed to
+        parse are remembered the same way and skipped until they change.
+        
+        Parsing and analysis run in a pool of ``workers`` processes (defaults to
+        WORKFLOW_INDEX_WORKERS or the CPU count); this process is the single
+        SQLite writer and stores results as they stream back in batches of
+        INDEX_BATCH_SIZE rows, all in one transaction.
+        
+        Full reindexes (force_reindex, or an empty database) take a bulk-load
+        path: the FTS sync triggers are dropped for the load and workflows_fts
+        is rebuilt and optimized once at the end. Incremental runs keep the
+        triggers, which only fire for the rows that changed.
+        """
         if not os.path.exists(self.workflows_dir):
             print(f"Warning: Workflows directory '{self.workflows_dir}' not found.")
             return {'processed': 0, 'skipped': 0, 'errors': 0}
         
-        json_files = glob.glob(os.path.join(self.workflows_dir, "*.json"))
+        json_files = self._scan_workflow_files()
         
         if not json_files:
             print(f"Warning: No JSON files found in '{self.workflows_dir}' directory.")
             return {'processed': 0, 'skipped': 0, 'errors': 0}
         
+        workers = self._resolve_workers(workers)
         print(f"Indexing {len(json_files)} workflow files...")
+        start_time = time.perf_counter()
         
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        
-        stats = {'processed': 0, 'skipped': 0, 'errors': 0}
-        
-        for file_path in json_files:
-            filename = os.path.basename(file_path)
+        with self._write_connection() as conn:
+            stats = {'processed': 0, 'skipped': 0, 'errors': 0}
             
-            try:
-                # Check if file needs to be reprocessed
-                if not force_reindex:
-                    current_hash = self.get_file_hash(file_path)
-                    cursor = conn.execute(
-                        "SELECT file_hash FROM workflows WHERE filename = ?", 
-                        (filename,)
-                    )
-                    row = cursor.fetchone()
-                    if row and row['file_hash'] == current_hash:
-                        stats['skipped'] += 1
+            # Check which files need to be reprocessed, from stat signatures alone;
+            # rows indexed before their content (or its brotli copy, once brotli is
+            # installed) was stored are reanalyzed once
+            known = {}
+            if not force_reindex:
+                cursor = conn.execute("""
+                    SELECT w.filename, w.file_hash, w.file_size, w.file_mtime_ns, w.file_inode,
+                           c.file_hash IS NOT NULL AND (c.content_br IS NOT NULL OR NOT ?) AS has_content
+                    FROM workflows w
+                    LEFT JOIN workflow_content c ON c.file_hash = w.file_hash
+                """, (brotli is not None,))
+                for row in cursor:
+                    if not row['has_content']:
+                        known[row['filename']] = (None, None)
                         continue
-                
-                # Analyze workflow
-                workflow_data = self.analyze_workflow_file(file_path)
+                    known[row['filename']] = (
+                        row['file_hash'],
+                        (row['file_size'], row['file_mtime_ns'], row['file_inode'])
+                    )
+            
+            failed = {}
+            if not force_reindex:
+                cursor = conn.execute("SELECT filename, file_size, file_mtime_ns, file_inode FROM workflow_errors")
+                for row in cursor:
+                    failed[row['filename']] = (row['file_size'], row['file_mtime_ns'], row['file_inode'])
+            
+            pending = []
+            for file_path, file_stat in json_files:
+                filename = os.path.basename(file_path)
+                stored = known.get(filename)
+                if (stored and stored[1] == file_stat) or failed.get(filename) == file_stat:
+                    stats['skipped'] += 1
+                    continue
+                pending.append((file_path, stored[0] if stored else None, file_stat))
+            
+            bulk_load = force_reindex or (not known and not conn.execute(
+                "SELECT EXISTS(SELECT 1 FROM workflows)"
+            ).fetchone()[0])
+            if bulk_load:
+                # DDL doesn't open a transaction implicitly; keep the trigger drop in the same one
+                conn.execute("BEGIN")
+                self._drop_fts_triggers(conn)
+            
+            # Analyze in parallel, store from this (the only writer) process
+            batch = []
+            unchanged = []
+            errors = []
+            file_stats = {task[0]: task[2] for task in pending}
+            for file_path, workflow_data in self._analyze_files(pending, workers):
                 if not workflow_data:
+                    errors.append((os.path.basename(file_path), *file_stats[file_path]))
                     stats['errors'] += 1
-                    continue
-                
-                # Insert or update in database
-                conn.execute("""
-                    INSERT OR REPLACE INTO workflows (
-                        filename, name, workflow_id, active, description, trigger_type,
-                        complexity, node_count, integrations, tags, created_at, updated_at,
-                        file_hash, file_size, analyzed_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (
-                    workflow_data['filename'],
-                    workflow_data['name'],
-                    workflow_data['workflow_id'],
-                    workflow_data['active'],
-                    workflow_data['description'],
-                    workflow_data['trigger_type'],
-                    workflow_data['complexity'],
-                    workflow_data['node_count'],
-                    json.dumps(workflow_data['integrations']),
-                    json.dumps(workflow_data['tags']),
-                    workflow_data['created_at'],
-                    workflow_data['updated_at'],
-                    workflow_data['file_hash'],
-                    workflow_data['file_size']
-                ))
-                
-                stats['processed'] += 1
-                
-            except Exception as e:
-                print(f"Error processing {file_path}: {str(e)}")
-                stats['errors'] += 1
-                continue
+                elif workflow_data.get('unchanged'):
+                    unchanged.append(workflow_data)
+                    stats['skipped'] += 1
+                else:
+                    batch.append(workflow_data)
+                    if len(batch) >= INDEX_BATCH_SIZE:
+                        self._store_workflows(conn, batch, stats)
+                        batch = []
+            
+            if batch:
+                self._store_workflows(conn, batch, stats)
+            if unchanged:
+                self._store_file_stats(conn, unchanged)
+            
+            # Every pending file was just read: forget old failures, record new ones
+            conn.executemany(
+                "DELETE FROM workflow_errors WHERE filename = ?",
+                [(os.path.basename(task[0]),) for task in pending]
+            )
+            conn.executemany(
+                "INSERT INTO workflow_errors (filename, file_size, file_mtime_ns, file_inode) VALUES (?, ?, ?, ?)",
+                errors
+            )
+            
+            if bulk_load:
+                self._create_fts_triggers(conn)
+                for table in self._fts_tables():
+                    conn.execute(f"INSERT INTO {table}({table}) VALUES('rebuild')")
+                    conn.execute(f"INSERT INTO {table}({table}) VALUES('optimize')")
+            
+            last_indexed = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            if stats['processed']:
+                self._refresh_stats(conn, last_indexed)
+                conn.execute("DELETE FROM workflow_diagrams WHERE file_hash NOT IN (SELECT file_hash FROM workflows)")
+                conn.execute("DELETE FROM workflow_content WHERE file_hash NOT IN (SELECT file_hash FROM workflows)")
+            
+            # Readers holding cached results compare against this to notice the new index
+            conn.execute("""
+                INSERT INTO workflow_stats (id, last_indexed, generation) VALUES (1, ?, 1)
+                ON CONFLICT(id) DO UPDATE SET
+                    last_indexed = excluded.last_indexed,
+                    generation = generation + 1
+            """, (last_indexed,))
+            
+            conn.commit()
+        
+        if np is not None and (stats['processed'] or TfidfMatrix.load(self.tfidf_path) is None):
+            self.write_tfidf_matrix()
         
-        conn.commit()
-        conn.close()
+        elapsed = time.perf_counter() - start_time
+        stats['elapsed'] = round(elapsed, 3)
+        stats['files_per_sec'] = round(len(json_files) / elapsed, 1) if elapsed > 0 else 0.0
         
-        print(f"✅ Indexing complete: {stats['processed']} processed, {stats['skipped']} skipped, {stats['errors']} errors")
+        print(f"✅ Indexing complete: {stats['processed']} processed, {stats['skipped']} skipped, {stats['errors']} errors "
+              f"in {stats['elapsed']:.2f}s ({stats['files_per_sec']:.0f} files/sec, {workers} workers)")
         return stats
     
     def search_workflows(self, query: str = "", trigger_filter: str = "all", 
                         complexity_filter: str = "all", active_only: bool = False,
-                        limit: int = 50, offset: int = 0) -> Tuple[List[Dict], int]:
+                        limit: int = 50, offset: int = 0,
+                        integration_filter: str = "all", node_type_filter: str = "all") -> Tuple[List[Dict], int]:
         """Fast search with filters and pagination."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        
-        # Build WHERE clause
-        where_conditions = []
-        params = []
-        
-        if active_only:
-            where_conditions.append("w.active = 1")
-        
-        if trigger_filter != "all":
-            where_conditions.append("w.trigger_type = ?")
-            params.append(trigger_filter)
-        
-        if complexity_filter != "all":
-            where_conditions.append("w.complexity = ?")
-            params.append(complexity_filter)
-        
-        # Use FTS search if query provided
-        if query.strip():
-            # FTS search with ranking
-            base_query = """
-                SELECT w.*, rank
-                FROM workflows_fts fts
-                JOIN workflows w ON w.id = fts.rowid
-                WHERE workflows_fts MATCH ?
-            """
-            params.insert(0, query)
+        page = self.search_page(
+            query=query,
+            trigger_filter=trigger_filter,
+            complexity_filter=complexity_filter,
+            active_only=active_only,
+            limit=limit,
+            offset=offset,
+            integration_filter=integration_filter,
+            node_type_filter=node_type_filter
+        )
+        return page['workflows'], page['total']
+    
+    def search_page(self, query: str = "", trigger_filter: str = "all",
+                    complexity_filter: str = "all", active_only: bool = False,
+                    limit: int = 50, offset: int = 0, integration_filter: str = "all",
+                    category_filter: str = "all", cursor: Optional[str] = None,
+                    total_mode: str = "exact", node_type_filter: str = "all",
+                    sort: Optional[str] = None, descending: bool = True,
+                    metric_min: Optional[Dict[str, int]] = None,
+                    metric_max: Optional[Dict[str, int]] = None, match: str = "fts") -> Dict[str, Any]:
+        """Search with filters, returning one page and a keyset cursor for the next.
+        
+        ``match`` picks how ``query`` is matched: ``fts`` takes FTS5 query
+        syntax against workflows_fts; ``substring`` finds the text anywhere
+        (inside words too) and ``fuzzy`` ranks rows by how many of its
+        trigrams they share, both through workflows_trigram. Either way rank
+        is bm25 weighted by FTS_COLUMN_WEIGHTS.
+        
+        By default text queries are ordered by FTS rank, everything else by most
+        recently analyzed. ``sort`` picks ``relevance``, ``recent`` or one of the
+        graph metrics in SORT_COLUMNS instead (``descending`` sets the direction;
+        relevance is always best first), with ``id`` breaking ties. Passing the
+        returned ``next_cursor`` back resumes right after the last row, so deep
+        pages cost the same as the first; ``offset`` is ignored when a cursor is
+        given. ``metric_min``/``metric_max`` bound graph metrics, keyed like
+        SORT_COLUMNS.
+        
+        ``total_mode`` controls the ``total`` in the result:
+        
+        - ``exact``: counted in the same query as the page (``COUNT(*) OVER ()``
+          over the sort keys only), so the FTS MATCH runs once. Cursor pages
+          can't see the rows before the cursor and pay for a separate COUNT.
+        - ``estimate``: like ``exact`` for text queries, where the in-page count
+          is free; otherwise counts at most TOTAL_ESTIMATE_CAP matches and sets
+          ``total_exact`` to False when the cap was hit. No total on ranked
+          cursor pages.
+        - ``none``: no counting; ``total`` is None.
+        
+        Raises ValueError for a malformed cursor, unknown total_mode, sort,
+        metric or match mode, and for substring/fuzzy searches that are too
+        short or unavailable (no trigram table).
+        """
+        if total_mode not in ('exact', 'estimate', 'none'):
+            raise ValueError(f"Invalid total mode: {total_mode}")
+        
+        ranked = bool(query.strip())
+        source, source_params = self._search_source(query, match)
+        conditions = self._filter_conditions(
+            active_only, trigger_filter, complexity_filter, integration_filter,
+            category_filter, node_type_filter, metric_min, metric_max
+        )
+        if sort is None or (sort == 'relevance' and not ranked):
+            sort = 'relevance' if ranked else 'recent'
+        if sort == 'relevance':
+            sort_expr, descending = "fts.rank", False
+            ordering = 'rank' if match == 'fts' else f"rank-{match}"
+        elif sort == 'recent':
+            sort_expr = "w.analyzed_at"
+            ordering = 'recent' if descending else 'recent-asc'
+        elif sort in SORT_COLUMNS:
+            sort_expr = f"w.{SORT_COLUMNS[sort]}"
+            ordering = f"{sort}-{'desc' if descending else 'asc'}"
         else:
-            # Regular query without FTS
-            base_query = """
-                SELECT w.*, 0 as rank
-                FROM workflows w
-                WHERE 1=1
+            raise ValueError(f"Invalid sort: {sort}")
+        direction = "DESC" if descending else "ASC"
+        
+        with self._read_connection() as conn:
+            # Only the sort keys are selected here; full rows are joined in for the final page alone
+            key_columns = f"w.id AS id, {sort_expr} AS sort_value, {'fts.rank' if ranked else '0'} AS rank"
+            key_order = f"ORDER BY sort_value {direction}, id {direction}"
+            page_order = f"ORDER BY k.sort_value {direction}, k.id {direction}"
+            
+            from_clause = source
+            params = list(source_params)
+            for _, condition, condition_params in conditions:
+                from_clause += f" AND {condition}"
+                params += condition_params
+            
+            # Seek past the previous page instead of skipping rows with OFFSET
+            keys_query = f"SELECT {key_columns} {from_clause}"
+            page_params = list(params)
+            if cursor:
+                sort_value, last_id = _decode_cursor(cursor, ordering)
+                keys_query += f" AND ({sort_expr}, w.id) {'<' if descending else '>'} (?, ?)"
+                page_params += [sort_value, last_id]
+                offset = 0
+            
+            # Ranked queries count alongside the page so the FTS MATCH runs once.
+            # Unranked pages walk the sort column's index, which a window would defeat, so
+            # they keep the separate (index-only) count below.
+            count_in_page = ranked and not cursor and total_mode != 'none'
+            if count_in_page:
+                keys_query = f"SELECT *, COUNT(*) OVER () AS total_count FROM ({keys_query})"
+            else:
+                keys_query = f"SELECT *, NULL AS total_count FROM ({keys_query})"
+            
+            # Get paginated results (one extra row tells whether another page exists)
+            page_query = f"""
+                SELECT w.*, k.rank AS rank, k.sort_value AS sort_value, k.total_count AS total_count
+                FROM ({keys_query} {key_order} LIMIT {limit + 1} OFFSET {offset}) k
+                JOIN workflows w ON w.id = k.id
+                {page_order}
             """
+            rows = conn.execute(page_query, page_params).fetchall()
+            
+            total = None
+            total_exact = False
+            if count_in_page and (rows or offset == 0):
+                total = rows[0]['total_count'] if rows else 0
+                total_exact = True
+            elif total_mode == 'exact':
+                # Cursor pages and pages past the end need the full count separately
+                count_query = f"SELECT COUNT(*) as total {from_clause}"
+                total = conn.execute(count_query, params).fetchone()['total']
+                total_exact = True
+            elif total_mode == 'estimate' and not ranked:
+                cap = max(TOTAL_ESTIMATE_CAP, offset + limit + 1)
+                count_query = f"SELECT COUNT(*) as total FROM (SELECT 1 {from_clause} LIMIT {cap})"
+                total = conn.execute(count_query, params).fetchone()['total']
+                total_exact = total < cap
         
-        if where_conditions:
-            base_query += " AND " + " AND ".join(where_conditions)
+        # Convert to dictionaries and parse JSON fields
+        results = [self._row_to_workflow(row) for row in rows[:limit]]
+        sort_values = [workflow.pop('sort_value', None) for workflow in results]
+        for workflow in results:
+            workflow.pop('total_count', None)
         
-        # Count total results
-        count_query = f"SELECT COUNT(*) as total FROM ({base_query}) t"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()['total']
+        # limit=0 only counts: the extra row says more exist, but there is no last row to resume after
+        next_cursor = None
+        if results and len(rows) > limit:
+            next_cursor = _encode_cursor(ordering, sort_values[-1], results[-1]['id'])
         
-        # Get paginated results
-        if query.strip():
-            base_query += " ORDER BY rank"
-        else:
-            base_query += " ORDER BY w.analyzed_at DESC"
+        return {'workflows': results, 'total': total, 'total_exact': total_exact, 'next_cursor': next_cursor}
+    
+    def _search_source(self, query: str, match: str = "fts") -> Tuple[str, List[Any]]:
+        """FROM/WHERE clause (rows aliased ``w``, FTS rows ``fts``) and params selecting a text query's matches.
         
-        base_query += f" LIMIT {limit} OFFSET {offset}"
+        An empty query selects every workflow. Raises ValueError for an unknown
+        match mode and for substring/fuzzy searches that can't run.
+        """
+        if match not in MATCH_MODES:
+            raise ValueError(f"Invalid match mode: {match}")
+        if not query.strip():
+            return "FROM workflows w WHERE 1=1", []
+        
+        fts_table = 'workflows_fts'
+        if match != 'fts':
+            if not self.trigram_enabled:
+                raise ValueError("Substring and fuzzy search need the trigram index (SQLite 3.34+)")
+            fts_table = 'workflows_trigram'
+            query = _trigram_query(query, match)
+        return f"""
+            FROM {fts_table} fts
+            JOIN workflows w ON w.id = fts.rowid
+            WHERE {fts_table} MATCH ?
+        """, [query]
+    
+    def _filter_conditions(self, active_only: bool = False, trigger_filter: str = "all",
+                           complexity_filter: str = "all", integration_filter: str = "all",
+                           category_filter: str = "all", node_type_filter: str = "all",
+                           metric_min: Optional[Dict[str, int]] = None,
+                           metric_max: Optional[Dict[str, int]] = None) -> List[Tuple[Optional[str], str, List[Any]]]:
+        """(facet, condition on ``w``, params) for each filter in use; facet is None outside FACETS."""
+        conditions = []
         
-        cursor = conn.execute(base_query, params)
-        rows = cursor.fetchall()
+        if active_only:
+            conditions.append(('active', "w.active = 1", []))
         
-        # Convert to dictionaries and parse JSON fields
-        results = []
-        for row in rows:
-            workflow = dict(row)
-            workflow['integrations'] = json.loads(workflow['integrations'] or '[]')
-            
-            # Parse tags and convert dict tags to strings
-            raw_tags = json.loads(workflow['tags'] or '[]')
-            clean_tags = []
-            for tag in raw_tags:
-                if isinstance(tag, dict):
-                    # Extract name from tag dict if available
-                    clean_tags.append(tag.get('name', str(tag.get('id', 'tag'))))
+        if trigger_filter != "all":
+            conditions.append(('trigger', "w.trigger_type = ?", [trigger_filter]))
+        
+        if complexity_filter != "all":
+            conditions.append(('complexity', "w.complexity = ?", [complexity_filter]))
+        
+        if integration_filter != "all":
+            conditions.append((
+                'integration',
+                "w.id IN (SELECT workflow_id FROM workflow_integrations WHERE integration = ?)",
+                [integration_filter]
+            ))
+        
+        if category_filter != "all":
+            conditions.append((
+                'category',
+                "w.id IN (SELECT workflow_id FROM workflow_integrations WHERE category = ?)",
+                [category_filter]
+            ))
+        
+        if node_type_filter != "all":
+            conditions.append((
+                None,
+                "w.id IN (SELECT workflow_id FROM workflow_nodes WHERE node_type = ?)",
+                [node_type_filter]
+            ))
+        
+        for bounds, operator in ((metric_min, ">="), (metric_max, "<=")):
+            for metric, value in (bounds or {}).items():
+                if metric not in SORT_COLUMNS:
+                    raise ValueError(f"Invalid metric: {metric}")
+                conditions.append((None, f"w.{SORT_COLUMNS[metric]} {operator} ?", [value]))
+        
+        return conditions
+    
+    def search_facets(self, query: str = "", trigger_filter: str = "all",
+                      complexity_filter: str = "all", active_only: bool = False,
+                      integration_filter: str = "all", category_filter: str = "all",
+                      node_type_filter: str = "all", metric_min: Optional[Dict[str, int]] = None,
+                      metric_max: Optional[Dict[str, int]] = None, match: str = "fts",
+                      integration_limit: int = 20) -> Dict[str, Any]:
+        """Result counts per trigger type, complexity, active flag, integration and category.
+        
+        Takes the same query and filters as search_page and runs them once:
+        the matches are materialized with one flag column per facet filter,
+        and every facet is a GROUP BY over that set in the same statement.
+        Each facet counts with all filters but its own, so its counts say
+        what choosing another value would return. Integrations are limited
+        to the ``integration_limit`` most common. Raises ValueError like
+        search_page.
+        """
+        source, source_params = self._search_source(query, match)
+        conditions = self._filter_conditions(
+            active_only, trigger_filter, complexity_filter, integration_filter,
+            category_filter, node_type_filter, metric_min, metric_max
+        )
+        
+        # Facet filters become flags on the materialized rows, the rest narrow them down
+        flags, flag_params = {}, []
+        where, where_params = source, list(source_params)
+        for facet, condition, condition_params in conditions:
+            if facet is None:
+                where += f" AND {condition}"
+                where_params += condition_params
+            else:
+                flags[facet] = condition
+                flag_params += condition_params
+        flag_columns = "".join(f", ({condition}) AS f_{facet}" for facet, condition in flags.items())
+        
+        def only(facet: Optional[str], *extra: str) -> str:
+            """WHERE clause applying ``extra`` and every facet filter except ``facet``'s."""
+            applied = [*extra, *(f"m.f_{other}" for other in flags if other != facet)]
+            return f"WHERE {' AND '.join(applied)}" if applied else ""
+        
+        # m is referenced by every facet, so SQLite materializes it once on its own
+        # (no MATERIALIZED hint, which needs SQLite 3.35+)
+        sql = f"""
+            WITH m AS (
+                SELECT w.id, w.trigger_type, w.complexity, w.active{flag_columns}
+                {where}
+            )
+            SELECT 'total' AS facet, NULL AS value, COUNT(*) AS count FROM m {only(None)}
+            UNION ALL
+            SELECT 'trigger', m.trigger_type, COUNT(*) FROM m {only('trigger')} GROUP BY m.trigger_type
+            UNION ALL
+            SELECT 'complexity', m.complexity, COUNT(*) FROM m {only('complexity')} GROUP BY m.complexity
+            UNION ALL
+            SELECT 'active', m.active = 1, COUNT(*) FROM m {only('active')} GROUP BY m.active = 1
+            UNION ALL
+            SELECT 'integration', wi.integration, COUNT(*)
+            FROM m JOIN workflow_integrations wi ON wi.workflow_id = m.id {only('integration')}
+            GROUP BY wi.integration
+            UNION ALL
+            SELECT 'category', wi.category, COUNT(DISTINCT m.id)
+            FROM m JOIN workflow_integrations wi ON wi.workflow_id = m.id {only('category', 'wi.category IS NOT NULL')}
+            GROUP BY wi.category
+        """
+        
+        facets = {'trigger': {}, 'complexity': {}, 'active': {}, 'integration': {}, 'category': {}}
+        total = 0
+        with self._read_connection() as conn:
+            for facet, value, count in conn.execute(sql, flag_params + where_params):
+                if facet == 'total':
+                    total = count
+                elif facet == 'active':
+                    facets['active']['true' if value else 'false'] = count
                 else:
-                    clean_tags.append(str(tag))
-            workflow['tags'] = clean_tags
-            
-            results.append(workflow)
+                    facets[facet][value] = count
+        
+        for facet, counts in facets.items():
+            ordered = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+            if facet == 'integration':
+                ordered = ordered[:integration_limit]
+            facets[facet] = dict(ordered)
+        return {'total': total, 'facets': facets}
+    
+    def _row_to_workflow(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a workflows row to a dictionary with parsed JSON fields."""
+        workflow = dict(row)
+        workflow['integrations'] = json.loads(workflow['integrations'] or '[]')
+        workflow['tags'] = self._parse_tags(workflow['tags'])
+        return workflow
+    
+    @staticmethod
+    def _parse_tags(tags_json: Optional[str]) -> List[str]:
+        """Parse a tags column, converting dict tags to their names."""
+        clean_tags = []
+        for tag in json.loads(tags_json or '[]'):
+            if isinstance(tag, dict):
+                # Extract name from tag dict if available
+                clean_tags.append(tag.get('name', str(tag.get('id', 'tag'))))
+            else:
+                clean_tags.append(str(tag))
+        return clean_tags
+    
+    def get_workflow(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Get one workflow by filename (a unique index lookup), or None if not indexed."""
+        with self._read_connection() as conn:
+            row = conn.execute("SELECT * FROM workflows WHERE filename = ?", (filename,)).fetchone()
+        return self._row_to_workflow(row) if row else None
+    
+    def get_workflows_by_ids(self, ids: List[int]) -> List[Dict[str, Any]]:
+        """Get workflows by id, in the order given (unknown ids are skipped)."""
+        if not ids:
+            return []
+        with self._read_connection() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM workflows WHERE id IN ({', '.join('?' * len(ids))})", ids
+            ).fetchall()
+        by_id = {row['id']: self._row_to_workflow(row) for row in rows}
+        return [by_id[workflow_id] for workflow_id in ids if workflow_id in by_id]
+    
+    def build_tfidf_matrix(self) -> 'TfidfMatrix':
+        """Build the TF-IDF matrix of every workflow from the index (requires numpy).
         
-        conn.close()
-        return results, total
+        Terms are the workflow's integrations, node types (weighted by how
+        many nodes of each type it has), tags and description words, each
+        prefixed by its kind. Weights are (1 + log tf) * smoothed idf, and
+        rows are L2-normalized so a dot product is a cosine similarity.
+        """
+        documents = {}
+        with self._read_connection() as conn:
+            for row in conn.execute("SELECT id, integrations, tags, description FROM workflows ORDER BY id"):
+                workflow = self._row_to_workflow(row)
+                terms = documents[workflow['id']] = {}
+                for integration in workflow['integrations']:
+                    terms[f"i:{integration.lower()}"] = 1
+                for tag in workflow['tags']:
+                    terms[f"t:{tag.lower()}"] = 1
+                for token in DESCRIPTION_TOKEN.findall((workflow['description'] or '').lower()):
+                    terms[f"d:{token}"] = terms.get(f"d:{token}", 0) + 1
+            for workflow_id, node_type, count in conn.execute(
+                "SELECT workflow_id, node_type, count FROM workflow_nodes"
+            ):
+                if workflow_id in documents:
+                    documents[workflow_id][f"n:{node_type}"] = count
+        
+        document_frequency = {}
+        for terms in documents.values():
+            for term in terms:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        columns = {term: column for column, term in enumerate(sorted(document_frequency))}
+        total = len(documents)
+        
+        ids = np.fromiter(documents, dtype=np.int64, count=total)
+        lengths = np.fromiter((len(terms) for terms in documents.values()), dtype=np.int64, count=total)
+        indptr = np.zeros(total + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        entries = [
+            (column, terms[term])
+            for terms in documents.values()
+            for column, term in sorted((columns[term], term) for term in terms)
+        ]
+        indices = np.fromiter((column for column, _ in entries), dtype=np.int32, count=len(entries))
+        counts = np.fromiter((count for _, count in entries), dtype=np.float64, count=len(entries))
+        frequencies = np.fromiter((document_frequency[term] for term in columns), dtype=np.float64)
+        idf = np.log((1 + total) / (1 + frequencies)) + 1
+        weights = (1 + np.log(counts)) * idf[indices]
+        
+        rows = np.repeat(np.arange(total), lengths)
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=total))
+        weights /= np.where(norms > 0, norms, 1)[rows]
+        return TfidfMatrix(ids, indptr, indices, weights.astype(np.float32))
+    
+    def build_suggest_index(self) -> 'SuggestIndex':
+        """Collect typeahead entries from the index into a SuggestIndex stamped with its generation."""
+        with self._read_connection() as conn:
+            state = conn.execute("SELECT generation, last_indexed FROM workflow_stats WHERE id = 1").fetchone()
+            generation, last_indexed = (state['generation'], state['last_indexed'] or '') if state else (0, '')
+            entries = [
+                (row[0], 'workflow', row[1])
+                for row in conn.execute("SELECT name, COUNT(*) FROM workflows WHERE name != '' GROUP BY name")
+            ]
+            entries += [
+                (row[0], 'integration', row[1])
+                for row in conn.execute("SELECT integration, COUNT(*) FROM workflow_integrations GROUP BY integration")
+            ]
+            entries += [
+                (row[0], 'node_type', row[1])
+                for row in conn.execute("SELECT node_type, COUNT(*) FROM workflow_nodes GROUP BY node_type")
+            ]
+            tags = {}
+            for row in conn.execute("SELECT tags FROM workflows WHERE tags != '[]'"):
+                for tag in set(self._parse_tags(row[0])):
+                    tags[tag] = tags.get(tag, 0) + 1
+            entries += [(tag, 'tag', count) for tag, count in tags.items()]
+        
+        return SuggestIndex(entries, generation, last_indexed)
+    
+    def write_tfidf_matrix(self):
+        """Rebuild the TF-IDF matrix and save it next to the database (see TfidfMatrix)."""
+        self.build_tfidf_matrix().save(self.tfidf_path)
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get database statistics."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Get database statistics (a single read of the workflow_stats row)."""
+        with self._read_connection() as conn:
+            row = conn.execute("SELECT * FROM workflow_stats WHERE id = 1").fetchone()
         
-        # Basic counts
-        cursor = conn.execute("SELECT COUNT(*) as total FROM workflows")
-        total = cursor.fetchone()['total']
-        
-        cursor = conn.execute("SELECT COUNT(*) as active FROM workflows WHERE active = 1")
-        active = cursor.fetchone()['active']
-        
-        # Trigger type breakdown
-        cursor = conn.execute("""
-            SELECT trigger_type, COUNT(*) as count 
-            FROM workflows 
-            GROUP BY trigger_type
-        """)
-        triggers = {row['trigger_type']: row['count'] for row in cursor.fetchall()}
-        
-        # Complexity breakdown
-        cursor = conn.execute("""
-            SELECT complexity, COUNT(*) as count 
-            FROM workflows 
-            GROUP BY complexity
-        """)
-        complexity = {row['complexity']: row['count'] for row in cursor.fetchall()}
-        
-        # Node stats
-        cursor = conn.execute("SELECT SUM(node_count) as total_nodes FROM workflows")
-        total_nodes = cursor.fetchone()['total_nodes'] or 0
-        
-        # Unique integrations count
-        cursor = conn.execute("SELECT integrations FROM workflows WHERE integrations != '[]'")
-        all_integrations = set()
-        for row in cursor.fetchall():
-            integrations = json.loads(row['integrations'])
-            all_integrations.update(integrations)
-        
-        conn.close()
+        if row is None:
+            return {
+                'total': 0, 'active': 0, 'inactive': 0, 'triggers': {}, 'complexity': {},
+                'total_nodes': 0, 'unique_integrations': 0, 'last_indexed': ''
+            }
         
         return {
-            'total': total,
-            'active': active,
-            'inactive': total - active,
-            'triggers': triggers,
-            'complexity': complexity,
-            'total_nodes': total_nodes,
-            'unique_integrations': len(all_integrations),
-            'last_indexed': datetime.datetime.now().isoformat()
+            'total': row['total'],
+            'active': row['active'],
+            'inactive': row['total'] - row['active'],
+            'triggers': json.loads(row['triggers'] or '{}'),
+            'complexity': json.loads(row['complexity'] or '{}'),
+            'total_nodes': row['total_nodes'],
+            'unique_integrations': row['unique_integrations'],
+            'last_indexed': row['last_indexed'] or ''
         }
 
+    def get_diagram(self, filename: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Get (file_hash, Mermaid diagram) for an indexed workflow, or None if not indexed.
+        
+        Diagrams normally come from the indexer; when one is missing the diagram
+        is None and the caller builds it with build_diagram and saves it with
+        store_diagram.
+        """
+        with self._read_connection() as conn:
+            row = conn.execute("""
+                SELECT w.file_hash, d.diagram FROM workflows w
+                LEFT JOIN workflow_diagrams d ON d.file_hash = w.file_hash
+                WHERE w.filename = ?
+            """, (filename,)).fetchone()
+        if row is None:
+            return None
+        return row['file_hash'], row['diagram']
+    
+    def build_diagram(self, filename: str) -> Tuple[str, str]:
+        """Read a workflow file and build its (file_hash, Mermaid diagram); no database access.
+        
+        Raises OSError / ValueError if the file can't be read.
+        """
+        with open(os.path.join(self.workflows_dir, filename), 'rb') as f:
+            content = f.read()
+        file_hash = hashlib.md5(content).hexdigest()
+        data = json.loads(content.decode('utf-8'))
+        return file_hash, generate_mermaid_diagram(data.get('nodes', []), data.get('connections', {}))
+    
+    def store_diagram(self, file_hash: str, diagram: str):
+        """Store a diagram under the hash of the content it was built from."""
+        with self._write_connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO workflow_diagrams (file_hash, diagram) VALUES (?, ?)",
+                (file_hash, diagram)
+            )
+            conn.commit()
+    
+    def get_workflow_content(self, file_hash: str, encoding: str = 'gzip') -> Optional[bytes]:
+        """Get the compressed bytes of the workflow file with this hash, or None if not stored.
+        
+        ``encoding`` is 'gzip' (always stored) or 'br' (only stored when brotli is installed).
+        """
+        column = {'gzip': 'content', 'br': 'content_br'}[encoding]
+        with self._read_connection() as conn:
+            row = conn.execute(f"SELECT {column} FROM workflow_content WHERE file_hash = ?", (file_hash,)).fetchone()
+        return row[column] if row else None
+    
+    def get_generation(self) -> int:
+        """Get the index generation, which changes whenever index_all_workflows runs."""
+        return self.get_index_state()[0]
+    
+    def get_index_state(self) -> Tuple[int, str]:
+        """Get (generation, last_indexed); together they identify one index run of one database."""
+        with self._read_connection() as conn:
+            row = conn.execute("SELECT generation, last_indexed FROM workflow_stats WHERE id = 1").fetchone()
+        return (row['generation'], row['last_indexed'] or '') if row else (0, '')
+
     def get_service_categories(self) -> Dict[str, List[str]]:
         """Get service categories for enhanced filtering."""
-        return {
-            'messaging': ['Telegram', 'Discord', 'Slack', 'WhatsApp', 'Mattermost', 'Microsoft Teams', 'Rocket.Chat'],
-            'email': ['Gmail', 'Mailjet', 'Email (IMAP)', 'Email (SMTP)', 'Outlook'],
-            'cloud_storage': ['Google Drive', 'Google Docs', 'Google Sheets', 'Dropbox', 'OneDrive', 'Box'],
-            'database': ['PostgreSQL', 'MySQL', 'MongoDB', 'Redis', 'Airtable', 'Notion'],
-            'project_management': ['Jira', 'GitHub', 'GitLab', 'Trello', 'Asana', 'Monday.com'],
-            'ai_ml': ['OpenAI', 'Anthropic', 'Hugging Face'],
-            'social_media': ['LinkedIn', 'Twitter/X', 'Facebook', 'Instagram'],
-            'ecommerce': ['Shopify', 'Stripe', 'PayPal'],
-            'analytics': ['Google Analytics', 'Mixpanel'],
-            'calendar_tasks': ['Google Calendar', 'Google Tasks', 'Cal.com', 'Calendly'],
-            'forms': ['Typeform', 'Google Forms', 'Form Trigger'],
-            'development': ['Webhook', 'HTTP Request', 'GraphQL', 'Server-Sent Events', 'YouTube']
-        }
+        return {category: list(services) for category, services in SERVICE_CATEGORIES.items()}
 
-    def search_by_category(self, category: str, limit: int = 50, offset: int = 0) -> Tuple[List[Dict], int]:
-        """Search workflows by service category."""
-        categories = self.get_service_categories()
-        if category not in categories:
-            return [], 0
+    def get_integrations(self) -> List[Dict[str, Any]]:
+        """Get every integration with its category and number of workflows using it."""
+        with self._read_connection() as conn:
+            cursor = conn.execute("""
+                SELECT integration, category, COUNT(*) as count
+                FROM workflow_integrations
+                GROUP BY integration
+                ORDER BY count DESC, integration
+            """)
+            integrations = [dict(row) for row in cursor.fetchall()]
+            
+        return integrations
+
+    def get_node_types(self) -> List[Dict[str, Any]]:
+        """Get every node type with the number of workflows using it and its total node count."""
+        with self._read_connection() as conn:
+            cursor = conn.execute("""
+                SELECT node_type, COUNT(*) as count, SUM(count) as nodes
+                FROM workflow_nodes
+                GROUP BY node_type
+                ORDER BY count DESC, node_type
+            """)
+            node_types = [dict(row) for row in cursor.fetchall()]
+        
+        return node_types
+
+    def get_similar_workflows(self, filename: str, limit: int = 10,
+                              min_similarity: float = 0.5) -> Optional[List[Dict[str, Any]]]:
+        """Workflows structurally similar to ``filename``, most similar first.
+        
+        Candidates come from shared LSH buckets, so the lookup touches only
+        workflows likely to be alike rather than the whole corpus; each is
+        then scored by signature_similarity and kept at ``min_similarity`` or
+        above. Every result carries its ``similarity``. Returns None for an
+        unknown filename.
+        """
+        with self._read_connection() as conn:
+            row = conn.execute("""
+                SELECT w.id, m.signature FROM workflows w
+                LEFT JOIN workflow_minhash m ON m.workflow_id = w.id
+                WHERE w.filename = ?
+            """, (filename,)).fetchone()
+            if row is None:
+                return None
+            if row['signature'] is None:
+                return []
+            
+            candidates = conn.execute("""
+                SELECT m.workflow_id, m.signature
+                FROM (
+                    SELECT DISTINCT other.workflow_id
+                    FROM workflow_lsh mine
+                    JOIN workflow_lsh other ON other.band = mine.band AND other.bucket = mine.bucket
+                    WHERE mine.workflow_id = ? AND other.workflow_id != mine.workflow_id
+                ) c
+                JOIN workflow_minhash m ON m.workflow_id = c.workflow_id
+            """, (row['id'],)).fetchall()
+            scored = sorted(
+                (
+                    (similarity, workflow_id)
+                    for workflow_id, signature in candidates
+                    for similarity in [signature_similarity(row['signature'], signature)]
+                    if similarity >= min_similarity
+                ),
+                key=lambda item: (-item[0], item[1])
+            )[:limit]
+            if not scored:
+                return []
+            
+            placeholders = ", ".join("?" * len(scored))
+            rows = conn.execute(
+                f"SELECT * FROM workflows WHERE id IN ({placeholders})",
+                [workflow_id for _, workflow_id in scored]
+            ).fetchall()
         
-        services = categories[category]
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        by_id = {row['id']: self._row_to_workflow(row) for row in rows}
+        results = []
+        for similarity, workflow_id in scored:
+            workflow = by_id[workflow_id]
+            workflow['similarity'] = similarity
+            results.append(workflow)
+        return results
+    
+    def find_duplicate_groups(self, min_similarity: float = DEDUPE_THRESHOLD) -> List[List[Dict[str, Any]]]:
+        """Group near-duplicate workflows, largest groups first.
         
-        # Build OR conditions for all services in category
-        service_conditions = []
-        params = []
-        for service in services:
-            service_conditions.append("integrations LIKE ?")
-            params.append(f'%"{service}"%')
-        
-        where_clause = " OR ".join(service_conditions)
-        
-        # Count total results
-        count_query = f"SELECT COUNT(*) as total FROM workflows WHERE {where_clause}"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()['total']
-        
-        # Get paginated results
-        query = f"""
-            SELECT * FROM workflows 
-            WHERE {where_clause}
-            ORDER BY analyzed_at DESC
-            LIMIT {limit} OFFSET {offset}
+        Only workflows sharing an LSH bucket are compared, and pairs already
+        known to be in one group are skipped. Groups are connected components
+        of pairs at ``min_similarity`` or above, each listed by filename with
+        ``id``, ``filename`` and ``name``.
         """
+        with self._read_connection() as conn:
+            signatures = dict(conn.execute("SELECT workflow_id, signature FROM workflow_minhash").fetchall())
+            buckets = conn.execute("""
+                SELECT group_concat(workflow_id) AS members
+                FROM workflow_lsh
+                GROUP BY band, bucket
+                HAVING COUNT(*) > 1
+            """).fetchall()
+            names = {
+                row['id']: (row['filename'], row['name'])
+                for row in conn.execute("SELECT id, filename, name FROM workflows")
+            }
+        
+        parent = {}
+        
+        def find(workflow_id):
+            root = workflow_id
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while workflow_id != root:
+                parent[workflow_id], workflow_id = root, parent.get(workflow_id, root)
+            return root
+        
+        for bucket in buckets:
+            members = sorted(int(member) for member in bucket['members'].split(','))
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    root_first, root_second = find(first), find(second)
+                    if root_first != root_second and \
+                            signature_similarity(signatures[first], signatures[second]) >= min_similarity:
+                        parent[root_second] = parent.setdefault(root_first, root_first)
+        
+        groups = {}
+        for workflow_id in parent:
+            groups.setdefault(find(workflow_id), []).append(workflow_id)
+        
+        return sorted(
+            (
+                [
+                    {'id': workflow_id, 'filename': names[workflow_id][0], 'name': names[workflow_id][1]}
+                    for workflow_id in sorted(members, key=lambda member: names[member][0])
+                ]
+                for members in groups.values()
+            ),
+            key=lambda group: (-len(group), group[0]['filename'])
+        )
+    
+    def search_by_category(self, category: str, limit: int = 50, offset: int = 0) -> Tuple[List[Dict], int]:
+        """Search workflows by service category (resolved through workflow_integrations)."""
+        if category not in SERVICE_CATEGORIES:
+            return [], 0
         
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
+        page = self.search_page(category_filter=category, limit=limit, offset=offset)
+        return page['workflows'], page['total']
+
+
+def _reference_analyze_nodes(nodes: List[Dict]) -> Tuple[str, set]:
+    """analyze_nodes as a plain per-node scan of SERVICE_MAPPINGS, without the
+    compiled name matcher or the node type cache; benchmark_analyze_nodes checks
+    the fast path against it."""
+    trigger_type = 'Manual'
+    integrations = set()
+    
+    for node in nodes:
+        node_type = node.get('type', '')
+        node_name = node.get('name', '').lower()
+        
+        if 'webhook' in node_type.lower() or 'webhook' in node_name:
+            trigger_type = 'Webhook'
+        elif 'cron' in node_type.lower() or 'schedule' in node_type.lower():
+            trigger_type = 'Scheduled'
+        elif 'trigger' in node_type.lower() and trigger_type == 'Manual':
+            if 'manual' not in node_type.lower():
+                trigger_type = 'Webhook'
         
-        # Convert to dictionaries and parse JSON fields
-        results = []
-        for row in rows:
-            workflow = dict(row)
-            workflow['integrations'] = json.loads(workflow['integrations'] or '[]')
-            raw_tags = json.loads(workflow['tags'] or '[]')
-            clean_tags = []
-            for tag in raw_tags:
-                if isinstance(tag, dict):
-                    clean_tags.append(tag.get('name', str(tag.get('id', 'tag'))))
-                else:
-                    clean_tags.append(str(tag))
-            workflow['tags'] = clean_tags
-            results.append(workflow)
+        service_name = None
+        if node_type.startswith('n8n-nodes-base.'):
+            raw_service = node_type.replace('n8n-nodes-base.', '').lower()
+            raw_service = raw_service.replace('trigger', '')
+            service_name = SERVICE_MAPPINGS.get(raw_service, raw_service.title() if raw_service else None)
+        elif node_type.startswith('@n8n/'):
+            raw_service = node_type.split('.')[-1].lower() if '.' in node_type else node_type.lower()
+            raw_service = raw_service.replace('trigger', '')
+            service_name = SERVICE_MAPPINGS.get(raw_service, raw_service.title() if raw_service else None)
+        elif '-' in node_type:
+            for part in node_type.lower().split('.'):
+                if 'youtube' in part:
+                    service_name = 'YouTube'
+                    break
+                elif 'telegram' in part:
+                    service_name = 'Telegram'
+                    break
+                elif 'discord' in part:
+                    service_name = 'Discord'
+                    break
         
-        conn.close()
-        return results, total
+        for service_key, service_value in SERVICE_MAPPINGS.items():
+            if service_key in node_name and service_value:
+                service_name = service_value
+                break
+        
+        if service_name and service_name not in ['None', None]:
+            integrations.add(service_name)
+    
+    if len(nodes) > 10 and len(integrations) > 3:
+        trigger_type = 'Complex'
+    
+    return trigger_type, integrations
+
+
+def benchmark_analyze_nodes(db: WorkflowDatabase, repeat: int = 5):
+    """Time analyze_nodes against the per-node dict scan over every node in the workflows directory."""
+    workflows = []
+    for file_path, _ in db._scan_workflow_files():
+        try:
+            with open(file_path, 'rb') as f:
+                workflows.append(json.loads(f.read().decode('utf-8')).get('nodes', []))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+    node_total = sum(len(nodes) for nodes in workflows)
+    if not node_total:
+        print("No nodes found to benchmark.")
+        return
+    
+    def reference():
+        for nodes in workflows:
+            _reference_analyze_nodes(nodes)
+    
+    def compiled():
+        for nodes in workflows:
+            db.analyze_nodes(nodes)
+    
+    _classify_node_type.cache_clear()
+    _match_service_in_name.cache_clear()
+    start = time.perf_counter()
+    compiled()
+    cold = time.perf_counter() - start
+    
+    for nodes in workflows:
+        assert db.analyze_nodes(nodes) == _reference_analyze_nodes(nodes)
+    
+    print(f"analyze_nodes: {len(workflows)} workflows, {node_total} nodes, best of {repeat} runs")
+    print(f"  compiled (cold cache) {cold * 1e6 / node_total:7.2f} µs/node")
+    for label, func in (("reference", reference), ("compiled", compiled)):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        print(f"  {label:<21} {min(timings) * 1e6 / node_total:7.2f} µs/node")
+
+
+def _reference_related(matrix: TfidfMatrix, workflow_id: int, limit: int) -> List[Tuple[int, float]]:
+    """TfidfMatrix.related the slow way: a Python dot product per row."""
+    rows = {
+        int(matrix.ids[row]): {
+            int(term): float(weight)
+            for term, weight in zip(matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]],
+                                    matrix.data[matrix.indptr[row]:matrix.indptr[row + 1]])
+        }
+        for row in range(len(matrix.ids))
+    }
+    query = rows.get(workflow_id, {})
+    scores = [
+        (other, sum(weight * query.get(term, 0.0) for term, weight in terms.items()))
+        for other, terms in rows.items() if other != workflow_id
+    ]
+    ranked = sorted((score, other) for other, score in scores if score > 0)
+    ranked.sort(key=lambda item: (-round(item[0], 4), item[1]))
+    return [(other, round(score, 4)) for score, other in ranked[:limit]]
+
+
+def benchmark_related(db: WorkflowDatabase, repeat: int = 200, samples: int = 50):
+    """Check TfidfMatrix.related against a per-row Python reference, then time both."""
+    if np is None:
+        print("numpy is not installed; nothing to benchmark.")
+        return
+    
+    # Empty rows after the last non-empty one must not cut that row's sum short
+    edge = TfidfMatrix(
+        np.array([1, 2, 3]), np.array([0, 1, 3, 3]),
+        np.array([1, 0, 1], dtype=np.int32), np.array([1.0, 0.6, 0.8], dtype=np.float32)
+    )
+    for workflow_id in edge.ids:
+        assert edge.related(int(workflow_id)) == _reference_related(edge, int(workflow_id), 10)
+    
+    matrix = db.build_tfidf_matrix()
+    if not len(matrix.ids):
+        print("No workflows indexed.")
+        return
+    sample_ids = [int(workflow_id) for workflow_id in matrix.ids[::max(1, len(matrix.ids) // samples)]]
+    for workflow_id in sample_ids:
+        fast = matrix.related(workflow_id, 10)
+        reference = _reference_related(matrix, workflow_id, 10)
+        # Equal scores may tie-break differently after float32 rounding; the scores must agree
+        assert [score for _, score in fast] == [score for _, score in reference], workflow_id
+    
+    workflow_id = sample_ids[0]
+    print(f"related(): {len(matrix.ids)} workflows, {len(matrix.data)} weights, "
+          f"{len(sample_ids)} rows checked against the reference")
+    for label, func, runs in (
+        ("python", lambda: _reference_related(matrix, workflow_id, 10), max(1, repeat // 20)),
+        ("numpy", lambda: matrix.related(workflow_id, 10), repeat),
+    ):
+        start = time.perf_counter()
+        for _ in range(runs):
+            func()
+        elapsed = (time.perf_counter() - start) / runs
+        print(f"  {label:<6} {elapsed * 1e3:8.3f} ms/query")
 
 
 def main():
@@ -718,15 +2614,22 @@ def main():
     parser = argparse.ArgumentParser(description='N8N Workflow Database')
     parser.add_argument('--index', action='store_true', help='Index all workflows')
     parser.add_argument('--force', action='store_true', help='Force reindex all files')
+    parser.add_argument('--workers', type=int, help='Worker processes for indexing (default: CPU count)')
     parser.add_argument('--search', help='Search workflows')
     parser.add_argument('--stats', action='store_true', help='Show database statistics')
+    parser.add_argument('--benchmark', action='store_true', help='Benchmark node analysis against the reference scan (µs per node)')
+    parser.add_argument('--benchmark-related', action='store_true',
+                        help='Check and time the TF-IDF related-workflows product (needs numpy)')
+    parser.add_argument('--dedupe-report', action='store_true', help='List groups of structurally near-duplicate workflows')
+    parser.add_argument('--threshold', type=float, default=DEDUPE_THRESHOLD,
+                        help=f'Similarity for --dedupe-report (default: {DEDUPE_THRESHOLD})')
     
     args = parser.parse_args()
     
     db = WorkflowDatabase()
     
     if args.index:
-        stats = db.index_all_workflows(force_reindex=args.force)
+        stats = db.index_all_workflows(force_reindex=args.force, workers=args.workers)
         print(f"Indexed {stats['processed']} workflows")
     
     elif args.search:
@@ -744,6 +2647,22 @@ def main():
         print(f"  Unique integrations: {stats['unique_integrations']}")
         print(f"  Trigger types: {stats['triggers']}")
     
+    elif args.benchmark:
+        benchmark_analyze_nodes(db)
+    
+    elif args.benchmark_related:
+        benchmark_related(db)
+    
+    elif args.dedupe_report:
+        groups = db.find_duplicate_groups(args.threshold)
+        redundant = sum(len(group) - 1 for group in groups)
+        print(f"Found {len(groups)} groups of near-duplicates (similarity >= {args.threshold}), "
+              f"{redundant} redundant workflows:")
+        for group in groups:
+            print(f"\n  {len(group)} workflows:")
+            for workflow in group:
+                print(f"    - {workflow['filename']} ({workflow['name']})")
+    
     else:
         parser.print_help()
 